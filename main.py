@@ -15,44 +15,75 @@ UPDATES:
 """
 
 import sys
-import uuid
+import hashlib
 import time
 import threading
+import traceback
 import socket
 import random
-import pygame
 import os
+import ntpath
+import wave
 import tkinter as tk
 from tkinter import messagebox
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import mutagen  # Optional: header-only duration probe
+except ImportError:
+    mutagen = None
 
 from src.backend.discovery import DiscoveryManager
 from src.backend.network_node import NetworkNode
 from src.backend.state_manager import StateManager, RELIABLE_MSG_TYPES
 from src.backend.bully_election import ElectionManager
 from src.backend.audio_engine import AudioEngine
-from src.utils.config import TCP_PORT, HEARTBEAT_INTERVAL
+from src.utils.config import TCP_PORT, HEARTBEAT_INTERVAL, ELECTION_START_DELAY, UI_REFRESH_MS, FOLLOWER_TICK_FACTOR, CONSOLE_LOG
+from src.utils.timefmt import clock_stamp
 from src.frontend.app_ui import PlaylistUI
 from src.utils.models import Song, Message
 
+LOOP_ERROR_LOG_EVERY = 20 # Print 1 in N maintenance loop / UI refresh errors
+PATH_CACHE_SIZE = 256 # Max memoized _resolve_path entries (oldest evicted first)
+MUSIC_DIR = './src/assets/music' # Searched by filename when a synced path doesn't exist locally
+MISSING_RECHECK_SECS = 5.0 # Re-probe a missing file this often in case it was copied in
+HISTORY_SIZE = 200 # Previously played songs kept for "Previous" (oldest dropped)
+SEEK_DEBOUNCE = 0.15 # Seconds of seek-bar quiet before the last position is applied
+SYNC_DRIFT_TOLERANCE = 0.5 # Seconds listeners' extrapolated position may drift before a resync
+SYNC_REFRESH_SECS = 5.0 # Resend the position at least this often (lossy TICKs may have been dropped)
+DIAL_WORKERS = 8 # Concurrent outgoing TCP handshakes for discovered peers
+
 # --- PATCHED NETWORK CLASS ---
 class PatchedNetworkNode(NetworkNode):
     """
     Extends NetworkNode to handle message payloads that the original 
     backend implementation ignores (specifically duration and play status).
     """
-    def _handle_logic(self, msg):
-        # Allow base class to handle standard logic (pos, queue, etc.)
-        super()._handle_logic(msg)
-        
-        if msg.msg_type == 'PLAYBACK_SYNC':
-            # Patch: Extract duration and play state which base class ignores
-            dur = msg.payload.get('dur')
-            if dur is not None:
-                self.state.current_duration = dur
-            
-            # Sync playing state if provided
-            if 'is_playing' in msg.payload:
-                self.state.is_playing = msg.payload['is_playing']
+    def _on_playback_sync(self, msg):
+        # Allow base class to handle standard logic (pos)
+        super()._on_playback_sync(msg)
+        self._apply_playback(msg.payload)
+
+    def _on_tick(self, msg):
+        super()._on_tick(msg)
+        # TICK carries the same fields as PLAYBACK_SYNC when a song is loaded
+        if 'pos' in msg.payload:
+            self._apply_playback(msg.payload)
+
+    def _apply_playback(self, payload):
+        # Anchor dead reckoning: position at sync time + local monotonic time since
+        self.state.sync_anchor_pos = payload.get('pos', 0)
+        self.state.sync_anchor_time = time.monotonic()
+
+        # Patch: Extract duration and play state which base class ignores
+        dur = payload.get('dur')
+        if dur is not None:
+            self.state.current_duration = dur
+        
+        # Sync playing state if provided
+        if 'is_playing' in payload:
+            self.state.is_playing = payload['is_playing']
 
 class CollaborativeNode:
     """
@@ -61,17 +92,21 @@ class CollaborativeNode:
     """
     
     def __init__(self, display_name=None, password=None):
+        self.ui = None # Set below; ui_log may run before the UI exists
         if not display_name or not password:
             print("ERROR: Name and Password are required.")
             sys.exit(1)
 
         # Generate a deterministic Node ID based on the user's credentials
         seed = f"{display_name}:{password}"
-        full_uuid = uuid.uuid5(uuid.NAMESPACE_DNS, seed)
-        self.node_id = str(full_uuid)[:8]
+        # 4-byte BLAKE2b digest -> 8 hex chars, no truncation needed
+        self.node_id = hashlib.blake2b(seed.encode(), digest_size=4).hexdigest()
         self.display_name = display_name
 
-        self.tcp_port = self._find_available_port(TCP_PORT)
+        # Bind the listener now and hand the socket to the network node, so no
+        # other process can take the port between probing and listening
+        self._listen_socket = self._bind_listener(TCP_PORT)
+        self.tcp_port = self._listen_socket.getsockname()[1] if self._listen_socket else TCP_PORT
         
         # Initialize UI with masked ID
         self.ui = PlaylistUI(f"{self.display_name} [{self.node_id} ...]", self.on_add_song_request)
@@ -88,14 +123,34 @@ class CollaborativeNode:
         self.state.is_playing = False
         self.state.shuffle_active = False
         self.state.repeat_mode = 0
+        self.state.sync_anchor_pos = 0
+        self.state.sync_anchor_time = time.monotonic()
         # --- COMPATIBILITY PATCH END ---
         
-        self.history = [] 
+        self.history = deque(maxlen=HISTORY_SIZE)
+        
+        # Memoized successful _resolve_path results: {raw file_path: resolved path}
+        self._path_cache = {}
+        # Whether a song's file is missing locally: {song_id: (bool, monotonic checked_at)}
+        self._missing_cache = {}
+        # (MUSIC_DIR mtime_ns, {lowercased filename: absolute path}), see _music_index
+        self._music_dir_state = (None, {})
+        # Track lengths in seconds, keyed by resolved path: {path: float}
+        self._duration_cache = {}
+        self._duration_failed = set() # Paths whose pygame probe failed (logged once each)
+        # Probes durations for newly added songs off the UI thread (one worker keeps add order)
+        self._probe_pool = ThreadPoolExecutor(max_workers=1)
+        self._prefetch_id = None # Id of the queue head whose length was last sent for probing
+        # Discovered peers are dialed here so handshakes overlap; _dialing holds in-flight ids
+        self._dial_pool = ThreadPoolExecutor(max_workers=DIAL_WORKERS)
+        self._dialing = set()
+        self._dial_lock = threading.Lock()
         
         # Initialize Networking
         # Use PatchedNetworkNode to ensure duration/status syncs are processed
         self.network = PatchedNetworkNode(self.node_id, self.state, self.ui_log)
         self.network.port = self.tcp_port
+        self.network.listen_socket = self._listen_socket
         
         # Initialize Election System (Bully Algorithm)
         self.election = ElectionManager(
@@ -114,12 +169,32 @@ class CollaborativeNode:
         self.network.audio = self.audio
         
         # Local Playback Flags
-        self.is_shuffle_active = False 
         self.last_played_id = None
         self.local_is_paused = False
         self.running = True
         self.is_seeking = False # Flag to prevent race condition during seek
         self.current_offset = 0.0 # Track playback offset for accurate timing
+        # Debounced seek: latest requested slider value and the timer that applies it
+        self._pending_seek = None
+        self._seek_timer = None
+        self._seek_lock = threading.Lock()
+        self._tick = 0 # Maintenance loop iteration counter
+        self._started_at = time.monotonic() # Reset in start(); anchors the first election
+        self._election_started = False
+        self._loop_errors = 0
+        self._ui_errors = 0 # Same counting for _ui_refresh_loop
+        # Set by UI commands to wake the maintenance loop before its next deadline
+        self._tick_event = threading.Event()
+        # Reused PLAYBACK_STATUS payload, refreshed in place before each send
+        self._status_msg = {'is_playing': False, 'shuffle': False, 'repeat_mode': 0}
+        # Position last piggybacked on a TICK: {pos, at, is_playing, dur, peers} or None
+        self._last_sync = None
+        # Playlist order last pushed via _broadcast_full_state (delta baseline)
+        self._last_sent_state = {'ids': []}
+        # What _refresh_ui last rendered per widget group; unchanged groups are skipped
+        self._ui_rendered = {}
+        # (leader_id, leader_name, state.host_version) as of the last lookup
+        self._cached_leader = (None, None, -1)
         
         # Map UI buttons to Class Methods
         self.ui.on_skip_next = self.on_skip_next
@@ -132,31 +207,53 @@ class CollaborativeNode:
         self.ui.on_remove_song = self.on_remove_song
         self.ui.on_volume_change = self.on_volume_change
 
-    def _find_available_port(self, start_port):
-        """Scans for an open TCP port starting from the config default."""
-        p = start_port
-        while p < start_port + 100:
+    def _bind_listener(self, start_port):
+        """
+        Returns a TCP socket bound to the config default port if free, otherwise
+        to an OS-picked ephemeral port (one bind instead of a linear scan).
+        Returns None if neither bind works.
+        """
+        for p in (start_port, 0):
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             try:
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.bind(('', p))
-                    return p
-            except: 
-                p += 1
-        return start_port
+                # Ignore TIME_WAIT leftovers from a previous run. Skipped on
+                # Windows, where SO_REUSEADDR would also allow stealing a live port.
+                if os.name != 'nt':
+                    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                s.bind(('', p))
+                return s
+            except OSError:
+                s.close()
+        return None
 
     def ui_log(self, message):
-        """Thread-safe logging to both console and UI terminal."""
-        formatted_msg = f"[{time.strftime('%H:%M:%S')}] {message}"
-        print(formatted_msg) 
-        if hasattr(self, 'ui'): self.ui.log_message(formatted_msg)
+        """
+        Thread-safe logging. The UI terminal formats and displays buffered
+        lines on its own thread; console output is optional (CONSOLE_LOG).
+        """
+        now = time.time()
+        if CONSOLE_LOG:
+            print(f"[{clock_stamp(now)}] {message}")
+        if self.ui is not None: self.ui.log_message(message, now)
 
     def on_add_song_request(self, file_path):
         """Handles user action to add a file to the playlist."""
+        self._probe_pool.submit(self._add_song, file_path)
+
+    def _add_song(self, file_path):
+        """Runs on the probe pool: reads the track length once, then queues and syncs the song."""
         title = os.path.basename(file_path)
-        new_song = Song(title=title, added_by=self.display_name, file_path=file_path)
+        # Re-resolve in case this path was previously missing; probing the resolved
+        # path keeps one _duration_cache key with _prefetch_duration/_play_song_logic
+        self._path_cache.pop(file_path, None)
+        # Only the host decodes with pygame; elsewhere an unreadable header leaves the
+        # length at 0 and the host probes it when the song comes up
+        duration = self._get_duration(self._resolve_path(file_path), default=0.0,
+                                      decode=self.election.is_host)
+        new_song = Song(title=title, added_by=self.display_name, file_path=file_path, duration=duration)
         
         self.state.add_song(new_song)
-        self._broadcast('QUEUE_SYNC', {'song': new_song})
+        self._broadcast('QUEUE_SYNC', {'song': new_song.to_compact()})
 
     def on_skip_next(self):
         """Logic for skipping to the next track. Only runs if this node is Host."""
@@ -168,9 +265,12 @@ class CollaborativeNode:
         if len(self.state.playlist) > 0:
             # Handle repeat all mode
             if self.state.repeat_mode == 1 and self.state.current_song:
-                self.state.playlist.append(self.state.current_song)
+                with self.state.lock:
+                    self.state.playlist.append(self.state.current_song)
+                self._broadcast('QUEUE_SYNC', {'song': self.state.current_song.to_compact()})
             
-            target_song = self.state.playlist.pop(0)
+            with self.state.lock:
+                target_song = self.state.playlist.popleft()
             if self.state.current_song:
                 self.history.append(self.state.current_song)
                 
@@ -180,6 +280,7 @@ class CollaborativeNode:
             self._play_song_logic(target_song)
         else:
             self._handle_queue_end()
+        self._tick_event.set()
 
     def on_skip_prev(self):
         """Logic for going to previous track or restarting current."""
@@ -195,13 +296,16 @@ class CollaborativeNode:
             self.audio.seek(0, resolved_path)
             self.current_offset = 0.0 # Reset offset on restart
             self.state.current_song_pos = 0
-            self._broadcast('PLAYBACK_SYNC', {'pos': 0, 'dur': getattr(self.state, 'current_duration', 0)})
+            self._broadcast('PLAYBACK_SYNC', {'pos': 0, 'dur': self.state.current_duration})
+            self._tick_event.set()
             return
             
         if self.history:
             prev_song = self.history.pop()
             if self.state.current_song:
-                self.state.playlist.insert(0, self.state.current_song)
+                with self.state.lock:
+                    self.state.playlist.appendleft(self.state.current_song)
+                self._broadcast('QUEUE_SYNC', {'song': self.state.current_song.to_compact()})
             self.state.current_song = prev_song
             self.state.current_song_pos = 0
             self.last_played_id = None 
@@ -211,7 +315,8 @@ class CollaborativeNode:
              self.audio.seek(0, resolved_path)
              self.current_offset = 0.0 # Reset offset
              self.state.current_song_pos = 0
-             self._broadcast('PLAYBACK_SYNC', {'pos': 0, 'dur': getattr(self.state, 'current_duration', 0)})
+             self._broadcast('PLAYBACK_SYNC', {'pos': 0, 'dur': self.state.current_duration})
+        self._tick_event.set()
 
     def on_play_pause(self):
         """Toggles playback state and notifies peers."""
@@ -225,19 +330,32 @@ class CollaborativeNode:
         action = 'pause' if is_paused else 'resume'
         self.ui_log(f"CMD: {action.upper()}")
         
-        status_msg = {
-            'is_playing': self.state.is_playing,
-            'shuffle': self.state.shuffle_active,
-            'repeat_mode': self.state.repeat_mode
-        }
-        self._broadcast('PLAYBACK_STATUS', status_msg)
+        self._refresh_status()
+        self._broadcast('PLAYBACK_STATUS', self._status_msg)
         self.ui.update_play_pause_icon(self.state.is_playing)
+        self._tick_event.set()
 
     def on_seek(self, value):
-        """Handles seek bar changes."""
+        """
+        Handles seek bar changes. Bursts are coalesced: the audio seek and
+        PLAYBACK_SYNC happen once, SEEK_DEBOUNCE after the last change.
+        """
         if not self.election.is_host: return
-        
-        dur = getattr(self.state, 'current_duration', 0)
+        with self._seek_lock:
+            self._pending_seek = float(value)
+            if self._seek_timer: self._seek_timer.cancel()
+            self._seek_timer = threading.Timer(SEEK_DEBOUNCE, self._apply_seek)
+            self._seek_timer.daemon = True
+            self._seek_timer.start()
+
+    def _apply_seek(self):
+        """Performs the most recent pending seek (runs on the debounce timer)."""
+        with self._seek_lock:
+            value, self._pending_seek = self._pending_seek, None
+            self._seek_timer = None
+        if value is None or not self.election.is_host or not self.state.current_song: return
+        
+        dur = self.state.current_duration
         if dur > 0:
             seek_sec = (float(value) / 100.0) * dur
             resolved_path = self._resolve_path(self.state.current_song.file_path)
@@ -256,62 +374,79 @@ class CollaborativeNode:
             self.is_seeking = False
             
             self._broadcast('PLAYBACK_SYNC', {'pos': seek_sec, 'dur': dur})
+            self._tick_event.set()
             
     def on_volume_change(self, val):
         self.audio.set_volume(val)
 
     def on_shuffle(self):
         if not self.election.is_host: return
-        self.is_shuffle_active = not self.is_shuffle_active
-        self.state.shuffle_active = self.is_shuffle_active
-        self.ui_log(f"CMD: Shuffle {'ON' if self.is_shuffle_active else 'OFF'}")
-        
-        if self.is_shuffle_active:
-            random.shuffle(self.state.playlist)
-            self._broadcast_full_state()
+        self.state.shuffle_active = not self.state.shuffle_active
+        self.ui_log(f"CMD: Shuffle {'ON' if self.state.shuffle_active else 'OFF'}")
+        
+        if self.state.shuffle_active:
+            with self.state.lock:
+                songs = list(self.state.playlist)
+                before = [s.id for s in songs]
+                random.shuffle(songs) # Shuffling a list avoids deque's O(n) indexing
+                self.state.playlist.clear()
+                self.state.playlist.extend(songs)
+            self._broadcast_full_state(baseline_ids=before)
             
-        self.ui.update_toggles(self.state.repeat_mode, self.is_shuffle_active)
+        self.ui.update_toggles(self.state.repeat_mode, self.state.shuffle_active)
+        self._tick_event.set()
 
     def on_repeat(self):
         if not self.election.is_host: return
         self.state.repeat_mode = (self.state.repeat_mode + 1) % 3
         modes = ["Off", "Repeat All", "Repeat One"]
         self.ui_log(f"CMD: Repeat Mode set to {modes[self.state.repeat_mode]}")
-        self.ui.update_toggles(self.state.repeat_mode, self.is_shuffle_active)
+        self.ui.update_toggles(self.state.repeat_mode, self.state.shuffle_active)
         
-        status_msg = {
-            'is_playing': self.state.is_playing,
-            'shuffle': self.state.shuffle_active,
-            'repeat_mode': self.state.repeat_mode
-        }
-        self._broadcast('PLAYBACK_STATUS', status_msg)
+        self._refresh_status()
+        self._broadcast('PLAYBACK_STATUS', self._status_msg)
 
     def on_clear_queue(self):
         if not self.election.is_host: return
         self.ui_log("CMD: Clear Queue")
-        self.state.playlist.clear()
+        with self.state.lock:
+            self.state.playlist.clear()
+        self._missing_cache.clear()
         self._broadcast('QUEUE_CLEARED', {})
 
     def on_remove_song(self, song_id):
         if not self.election.is_host: return
-        self.state.playlist = [s for s in self.state.playlist if s.id != song_id]
+        self.state.remove_song(song_id)
+        self._missing_cache.pop(song_id, None)
         self.ui_log(f"Removed ID: {song_id}")
         self._broadcast('REMOVE_SONG', {'song_id': song_id})
 
-    def _broadcast(self, msg_type, payload):
-        """Helper to send a message to all connected TCP peers."""
+    def _refresh_status(self):
+        """Copies playback flags from state into the shared PLAYBACK_STATUS payload."""
+        self._status_msg['is_playing'] = self.state.is_playing
+        self._status_msg['shuffle'] = self.state.shuffle_active
+        self._status_msg['repeat_mode'] = self.state.repeat_mode
+
+    def _broadcast(self, msg_type, payload, peers=None):
+        """
+        Helper to send a message to all connected TCP peers.
+        `peers` lets a caller reuse a peer-id snapshot it already took.
+        """
+        if peers is None:
+            peers = self.network.peer_ids
+        if not peers:
+            return  # Solo node: nothing to encode or send
         if msg_type in RELIABLE_MSG_TYPES:
-            self._reliable_broadcast(msg_type, payload)
+            self._reliable_broadcast(msg_type, payload, peers)
         else:
-            for pid in list(self.network.connections.keys()):
-                self.network.send_to_peer(pid, msg_type, payload=payload)
+            self.network.broadcast(msg_type, payload, peers)
 
-    def _reliable_broadcast(self, msg_type, payload):
+    def _reliable_broadcast(self, msg_type, payload, peers=None):
         """
         Sends a reliable message to all peers with ACK tracking.
         Messages will be retransmitted until all peers acknowledge.
         """
-        target_peers = list(self.network.connections.keys())
+        target_peers = list(peers if peers is not None else self.network.peer_ids)
         if not target_peers:
             return  # No peers to send to
 
@@ -331,22 +466,16 @@ class CollaborativeNode:
         self.state.register_pending_ack(msg.msg_id, msg, target_peers)
 
         # Send to all peers
+        frame = self.network.frame_message(msg)
         for pid in target_peers:
-            self._send_message_direct(pid, msg)
+            self._send_message_direct(pid, frame)
 
-    def _send_message_direct(self, node_id, msg: Message):
-        """Sends a pre-constructed Message object directly (for retransmissions)."""
+    def _send_message_direct(self, node_id, frame):
+        """Sends a pre-encoded Message frame directly (for retransmissions)."""
         if node_id not in self.network.connections:
             return
-        try:
-            import struct
-            import pickle
-            data = pickle.dumps(msg)
-            header = struct.pack('>I', len(data))
-            self.network.connections[node_id].sendall(header + data)
-        except Exception as e:
-            self.ui_log(f"[Reliable] Send failed to {node_id}: {e}")
-            self.network.connections.pop(node_id, None)
+        if not self.network.send_raw(node_id, frame):
+            self.ui_log(f"[Reliable] Send failed to {node_id}")
 
     def _retransmission_check(self):
         """
@@ -358,24 +487,68 @@ class CollaborativeNode:
             msg = entry['msg']
             peers = entry['peers']
             self.ui_log(f"[Reliable] Retransmitting msg_id={entry['msg_id']} to {peers}")
+            frame = self.network.frame_message(msg)
             for pid in peers:
-                self._send_message_direct(pid, msg)
+                self._send_message_direct(pid, frame)
 
-    def _broadcast_full_state(self):
-        """Sends the entire playlist and status state to all peers."""
+    def _broadcast_full_state(self, baseline_ids=None):
+        """
+        Sends playlist changes and status state to all peers. Only the playlist
+        delta against `baseline_ids` (the order peers hold; defaults to what was
+        last sent) travels; full snapshots are reserved for the join handshake.
+        """
+        if baseline_ids is None:
+            baseline_ids = self._last_sent_state.get('ids', [])
         self._broadcast('FULL_STATE_SYNC', {
-            'playlist': self.state.playlist, 
-            'current_song': self.state.current_song,
+            'delta': self.state.make_playlist_delta(baseline_ids),
+            'current_song': self.state.current_song.to_compact() if self.state.current_song else None,
             'is_playing': self.state.is_playing,
             'shuffle': self.state.shuffle_active,
             'repeat_mode': self.state.repeat_mode
         })
+        self._last_sent_state['ids'] = [s.id for s in self.state.snapshot_playlist()]
 
-    def _get_duration(self, file_path):
-        try:
-            return pygame.mixer.Sound(file_path).get_length()
-        except:
-            return 180.0 
+    def _get_duration(self, file_path, default=180.0, decode=True):
+        """
+        Returns the track length of a resolved path, probing the file only on first request.
+        Reads headers only (mutagen, or the stdlib wave module for .wav);
+        decoding the whole file with pygame is the last resort, skipped (default
+        returned, nothing cached) when decode is False.
+        """
+        if file_path in self._duration_cache:
+            return self._duration_cache[file_path]
+        duration = None
+        if mutagen is not None:
+            try:
+                audio = mutagen.File(file_path)
+                if audio is not None and audio.info.length > 0:
+                    duration = audio.info.length
+            except Exception:  # mutagen surfaces corrupt headers as assorted errors
+                pass
+        if duration is None and file_path.lower().endswith('.wav'):
+            try:
+                with wave.open(file_path, 'rb') as wav:
+                    if wav.getframerate() > 0:
+                        duration = wav.getnframes() / wav.getframerate()
+            except (wave.Error, EOFError, OSError):
+                pass
+        if duration is None and not decode:
+            return default
+        if duration is None:
+            # Sound() needs a running mixer, which otherwise only starts on first playback.
+            # If it can't start, nothing is cached so a later call probes again.
+            if not self.audio.ensure_mixer():
+                return default
+            import pygame  # Deferred: this probe is the only direct pygame use in this module
+            try:
+                duration = pygame.mixer.Sound(file_path).get_length()
+            except (pygame.error, OSError) as e:
+                if file_path not in self._duration_failed:
+                    self._duration_failed.add(file_path)
+                    self.ui_log(f"Could not read length of {os.path.basename(file_path)}: {e}")
+                return default
+        self._duration_cache[file_path] = duration
+        return duration
 
     def _resolve_path(self, file_path):
         """
@@ -385,28 +558,96 @@ class CollaborativeNode:
         3. Case-insensitivity (Song.mp3 vs song.mp3) to support cross-OS sync.
         """
         if not file_path: return ""
+        cached = self._path_cache.get(file_path)
+        if cached is not None:
+            return cached
+
         # 1. Exact match (Absolute path or relative to CWD)
         if os.path.exists(file_path): 
+            self._cache_path(file_path, file_path)
             return file_path
             
         # 2. Extract clean filename
-        # Handles mixed separators from different OSs
-        normalized_name = file_path.replace('\\', '/').split('/')[-1]
-        
-        # 3. Define directories to search
-        search_dir = './src/assets/music'
-        
-        # A. Check exact match in directory
-        candidate = os.path.join(search_dir, normalized_name)
-        if os.path.exists(candidate):
-            return os.path.abspath(candidate)
+        # ntpath splits on both '\\' and '/', so Windows paths synced to other OSs work too
+        normalized_name = ntpath.basename(file_path)
+        
+        # 3. Look the name up in the music directory (case-insensitive)
+        resolved = self._music_index().get(normalized_name.lower())
+        if resolved:
+            self._cache_path(file_path, resolved)
+            return resolved
             
+        # Not found: left uncached so a file copied in later is picked up
         return file_path
 
-    def _play_song_logic(self, song, start_offset=0):
-        resolved_path = self._resolve_path(song.file_path)
-        
-        if not os.path.exists(resolved_path):
+    def _music_index(self):
+        """
+        Filename index of MUSIC_DIR: {lowercased name: absolute path}. Rebuilt with
+        one scandir only when the directory's mtime changes (a file added/removed).
+        """
+        try:
+            mtime = os.stat(MUSIC_DIR).st_mtime_ns
+        except OSError:
+            return {}
+        if self._music_dir_state[0] != mtime:
+            with os.scandir(MUSIC_DIR) as entries:
+                index = {e.name.lower(): os.path.abspath(e.path) for e in entries if e.is_file()}
+            self._music_dir_state = (mtime, index)
+        return self._music_dir_state[1]
+
+    def _cache_path(self, file_path, resolved):
+        """Stores a resolution, evicting the oldest entry once PATH_CACHE_SIZE is reached."""
+        if len(self._path_cache) >= PATH_CACHE_SIZE:
+            self._path_cache.pop(next(iter(self._path_cache)))
+        self._path_cache[file_path] = resolved
+
+    def _is_missing(self, song):
+        """
+        Cached local-file check for a song. A present file stays cached; a missing
+        one is re-probed every MISSING_RECHECK_SECS.
+        """
+        now = time.monotonic()
+        cached = self._missing_cache.get(song.id)
+        if cached is not None and (not cached[0] or now - cached[1] < MISSING_RECHECK_SECS):
+            return cached[0]
+        is_missing = not os.path.exists(self._resolve_path(song.file_path))
+        self._missing_cache[song.id] = (is_missing, now)
+        return is_missing
+
+    def _probe_file(self, song):
+        """
+        Resolves and stats a song's file once: {'path', 'exists', 'duration'}.
+        duration is song.duration (0 if unknown); the result also refreshes _missing_cache.
+        """
+        path = self._resolve_path(song.file_path)
+        exists = os.path.exists(path)
+        self._missing_cache[song.id] = (not exists, time.monotonic())
+        return {'path': path, 'exists': exists, 'duration': song.duration}
+
+    def _prefetch_next_duration(self):
+        """
+        Host: if the next queued song arrived without a length (its adder couldn't
+        probe it), probes it on the probe pool now so starting it needs no file read.
+        """
+        with self.state.lock:
+            song = self.state.playlist[0] if self.state.playlist else None
+        if song is None or song.duration or song.id == self._prefetch_id: return
+        self._prefetch_id = song.id
+        self._probe_pool.submit(self._prefetch_duration, song)
+
+    def _prefetch_duration(self, song):
+        """Runs on the probe pool: stores the probed length on the song (and _duration_cache)."""
+        path = self._resolve_path(song.file_path)
+        if os.path.exists(path):
+            song.duration = self._get_duration(path, default=0.0)
+
+    def _play_song_logic(self, song, start_offset=0, probe=None):
+        if probe is None:
+            probe = self._probe_file(song)
+        resolved_path = probe['path']
+        is_missing = not probe['exists']
+        
+        if is_missing:
             self.ui_log(f"Error: File missing locally: {resolved_path}")
             self.ui.show_notification(f"Missing File: {song.title}", is_error=True)
             
@@ -414,8 +655,9 @@ class CollaborativeNode:
             if self.election.is_host:
                 self.ui_log("Host missing file. Skipping to next...")
                 self.last_played_id = song.id 
-                if len(self.state.playlist) > 0:
-                    next_song = self.state.playlist.pop(0)
+                with self.state.lock:
+                    next_song = self.state.playlist.popleft() if self.state.playlist else None
+                if next_song is not None:
                     self.state.current_song = next_song
                     self.state.current_song_pos = 0
                     self._play_song_logic(next_song)
@@ -423,17 +665,16 @@ class CollaborativeNode:
                     self._handle_queue_end()
                 return
             
-        if self.audio.play_song(resolved_path, start_time=start_offset):
+        if self.audio.play_song(resolved_path, start_time=start_offset, verified=not is_missing):
             self.current_offset = start_offset # Initialize offset
             self.local_is_paused = False 
             self.last_played_id = song.id
-            self.state.current_duration = self._get_duration(resolved_path)
+            # Length travels with the song; only probe locally if the adder couldn't
+            self.state.current_duration = probe['duration'] or self._get_duration(resolved_path)
             self.state.is_playing = True
             
-            self._broadcast('NOW_PLAYING', {'song': song})
+            self._broadcast('NOW_PLAYING', {'song': song.to_compact()})
             self._broadcast('PLAYBACK_SYNC', {'pos': start_offset, 'dur': self.state.current_duration})
-            
-            self._broadcast_full_state()
             self.ui.update_play_pause_icon(True)
 
     def _handle_queue_end(self):
@@ -450,95 +691,165 @@ class CollaborativeNode:
         self._broadcast('NOW_PLAYING', {'song': None})
         self._broadcast('PLAYBACK_SYNC', {'pos': 0, 'dur': 0})
         
-        status_msg = {
-            'is_playing': False,
-            'shuffle': self.state.shuffle_active,
-            'repeat_mode': self.state.repeat_mode
-        }
-        self._broadcast('PLAYBACK_STATUS', status_msg)
+        self._refresh_status()
+        self._broadcast('PLAYBACK_STATUS', self._status_msg)
         self.last_played_id = None
 
     def _refresh_ui(self):
-        """Periodic UI update called from maintenance loop."""
-        if not hasattr(self, 'ui'): return
+        """Periodic UI update, run on the Tk thread by _ui_refresh_loop."""
+        if self.ui is None: return
         is_host = self.election.is_host
-        leader = self.state.get_host()
-        
-        # PATCH: Use new safety method because older backend doesn't sync names
-        host_name = self.state.get_peer_name(leader) if leader else "Unknown"
+        if not is_host and self.state.is_playing and self.state.current_duration > 0:
+            # Listener dead reckoning: extrapolate from the last sync anchor (no accumulated
+            # error when ticks stall or jitter), clamped to duration
+            self.state.current_song_pos = min(
+                self.state.sync_anchor_pos + (time.monotonic() - self.state.sync_anchor_time),
+                self.state.current_duration
+            )
+        # The leader only changes via set_host, so look it up again only after that
+        version = self.state.host_version
+        if self._cached_leader[2] != version:
+            leader = self.state.get_host()
+            # PATCH: Use new safety method because older backend doesn't sync names
+            host_name = self.state.get_peer_name(leader) if leader else "Unknown"
+            self._cached_leader = (leader, host_name, version)
+        leader, host_name, _ = self._cached_leader
             
-        self.ui.set_controls_visible(is_host, host_id=leader, host_name=host_name)
+        if self._ui_changed('controls', (is_host, leader, host_name)):
+            self.ui.set_controls_visible(is_host, host_id=leader, host_name=host_name)
         cp = self.state.current_song
         
         if cp:
-            resolved = self._resolve_path(cp.file_path)
-            if not os.path.exists(resolved):
-                self.ui.update_now_playing(f"[MISSING] {cp.title}", cp.artist)
+            # Listeners never run _play_song_logic, so the probe may happen here
+            if self._is_missing(cp):
+                now_playing = (f"[MISSING] {cp.title}", cp.artist)
             else:
-                self.ui.update_now_playing(cp.title, cp.artist)
+                now_playing = (cp.title, cp.artist)
         else:
-            self.ui.update_now_playing(None, "Unknown")
+            now_playing = (None, "Unknown")
+        if self._ui_changed('now_playing', now_playing):
+            self.ui.update_now_playing(*now_playing)
             
-        self.ui.update_playlist(self.state.playlist, current_song_id=cp.id if cp else None)
-        self.ui.update_progress(self.state.current_song_pos, getattr(self.state, 'current_duration', 0))
-        self.ui.update_toggles(self.state.repeat_mode, self.is_shuffle_active)
+        # Rebuilding the playlist widget is the expensive part; skip it while order is unchanged
+        current_id = cp.id if cp else None
+        songs = self.state.snapshot_playlist()
+        if self._ui_changed('playlist', (tuple(s.id for s in songs), current_id)):
+            self.ui.update_playlist(songs, current_song_id=current_id)
+        # Labels show whole seconds, so redraw progress only when those change
+        if self._ui_changed('progress', (int(self.state.current_song_pos), int(self.state.current_duration))):
+            self.ui.update_progress(self.state.current_song_pos, self.state.current_duration)
+        if self._ui_changed('toggles', (self.state.repeat_mode, self.state.shuffle_active)):
+            self.ui.update_toggles(self.state.repeat_mode, self.state.shuffle_active)
+
+    def _ui_refresh_loop(self):
+        """Runs _refresh_ui on the Tk thread every UI_REFRESH_MS, independent of heartbeats."""
+        try:
+            self._refresh_ui()
+        except Exception:
+            # Same rate limit as the maintenance loop: this runs 4x a second
+            self._ui_errors += 1
+            if self._ui_errors % LOOP_ERROR_LOG_EVERY == 1:
+                print(f"Error in UI refresh (occurrence #{self._ui_errors}):")
+                traceback.print_exc()
+        self.ui.root.after(UI_REFRESH_MS, self._ui_refresh_loop)
+
+    def _ui_changed(self, group, key):
+        """Records `key` as rendered for `group`; True if it differs from last time."""
+        if self._ui_rendered.get(group) == key:
+            return False
+        self._ui_rendered[group] = key
+        return True
 
     def _maintenance_loop(self):
         """Background thread for keeping state, UI, and Network in sync."""
         time.sleep(2) 
+        next_deadline = time.monotonic()
         while self.running:
+            now = time.monotonic()
+            self._tick += 1
             try:
-                self.state.update_uptime(int(time.time() - self.election.init_time))
-                self._refresh_ui()
+                self.state.update_uptime(self.election.uptime)
                 
                 if self.election.is_host:
                     # Host Logic: Send Heartbeats and Manage Audio Queue
-                    for pid in list(self.network.connections.keys()):
-                        self.network.send_to_peer(pid, 'HEARTBEAT')
+                    peer_ids = self.network.peer_ids
+                    is_busy = self.audio.is_busy()
+                    if is_busy:
+                        # Update playback position while playing
+                        # get_current_pos() counts from the last play/seek start point, so add the offset
+                        self.state.current_song_pos = self.audio.get_current_pos() + self.current_offset
+
+                    if peer_ids:
+                        # One combined TICK per tick: acts as the heartbeat and, while a song
+                        # is playing or paused, carries the position (piggybacking is_playing)
+                        # whenever listeners' dead reckoning would have drifted
+                        tick = {}
+                        if not (is_busy or self.local_is_paused):
+                            self._last_sync = None
+                        elif self._sync_needed(now, peer_ids):
+                            tick = {
+                                'pos': self.state.current_song_pos, 
+                                'dur': self.state.current_duration,
+                                'is_playing': self.state.is_playing
+                            }
+                            self._last_sync = dict(tick, at=now, peers=peer_ids)
+                        self._broadcast('TICK', tick, peers=peer_ids)
                         self.election.update_heartbeat()
 
-                    if self.audio.is_busy():
-                        # Update playback position while playing
-                        # Pygame's get_pos() returns time since play() started, so we must add the offset
-                        current_pos = self.audio.get_current_pos() + self.current_offset
-                        self.state.current_song_pos = current_pos
-                        # Piggyback is_playing state for listeners
-                        payload = {
-                            'pos': current_pos, 
-                            'dur': getattr(self.state, 'current_duration', 0),
-                            'is_playing': self.state.is_playing
-                        }
-                        self._broadcast('PLAYBACK_SYNC', payload)
-                    elif self.local_is_paused:
-                        # If paused, broadcast last known position
-                        payload = {
-                            'pos': self.state.current_song_pos, 
-                            'dur': getattr(self.state, 'current_duration', 0),
-                            'is_playing': self.state.is_playing
-                        }
-                        self._broadcast('PLAYBACK_SYNC', payload)
-                    else:
+                    self._prefetch_next_duration()
+
+                    if not is_busy and not self.local_is_paused:
                         # Song finished, select next
                         # FIX: Check if we are currently seeking to prevent race condition
                         if not self.is_seeking:
                             self._process_auto_next_song()
-                else:
-                    # Listener Logic: Dead reckoning for smooth UI
-                    # If state says playing, increment local timer by the heartbeat interval
-                    if self.state.is_playing and self.state.current_duration > 0:
-                        self.state.current_song_pos += HEARTBEAT_INTERVAL
-                        # Clamp to duration
-                        if self.state.current_song_pos > self.state.current_duration:
-                            self.state.current_song_pos = self.state.current_duration
-                    
-                self.election.check_for_host_failure()
+                elif self._tick % FOLLOWER_TICK_FACTOR == 0:
+                    # Listener Logic: only watch the host, every FOLLOWER_TICK_FACTOR ticks.
+                    # Position dead reckoning is done by _refresh_ui, the only reader that needs it smooth
+                    self.election.check_for_host_failure(now)
+
+                # First election, delayed to allow discovery (runs on a tick, no extra thread)
+                if not self._election_started and now - self._started_at >= ELECTION_START_DELAY:
+                    self._election_started = True
+                    self.ui_log(f"start: ELECTION (Score-Based)")
+                    self.election.query_commission()
 
                 # ============ RELIABLE MULTICAST: Check for retransmissions ============
                 self._retransmission_check()
+            except Exception:
+                # Rate-limited: a persistent fault shouldn't format a traceback every tick
+                self._loop_errors += 1
+                if self._loop_errors % LOOP_ERROR_LOG_EVERY == 1:
+                    print(f"Error in maintenance loop (occurrence #{self._loop_errors}):")
+                    traceback.print_exc()
+
+            # Sleep until the next deadline so the cadence stays at HEARTBEAT_INTERVAL regardless
+            # of how long the work took (retransmissions must keep that pace on every node)
+            next_deadline += HEARTBEAT_INTERVAL
+            sleep_for = next_deadline - time.monotonic()
+            if sleep_for > 0:
+                if self._tick_event.wait(sleep_for):
+                    # Woken by a UI command: run a tick now and restart the cadence
+                    self._tick_event.clear()
+                    next_deadline = time.monotonic()
+            else:
+                # Fell behind (e.g. a long stall): resync instead of bursting
+                next_deadline = time.monotonic()
 
-                time.sleep(HEARTBEAT_INTERVAL)
-            except Exception as e:
-                print(f"Error in maintenance loop: {e}")
+    def _sync_needed(self, now, peer_ids):
+        """
+        True if listeners extrapolating from the last sent position would now be
+        off by more than SYNC_DRIFT_TOLERANCE, play state, duration or peers changed,
+        or SYNC_REFRESH_SECS passed since the last position was sent.
+        """
+        last = self._last_sync
+        if (last is None or now - last['at'] >= SYNC_REFRESH_SECS
+                or last['peers'] != peer_ids
+                or last['is_playing'] != self.state.is_playing
+                or last['dur'] != self.state.current_duration):
+            return True
+        expected = last['pos'] + (now - last['at'] if last['is_playing'] else 0)
+        return abs(self.state.current_song_pos - expected) > SYNC_DRIFT_TOLERANCE
 
     def _process_auto_next_song(self):
         """Determines the next song when audio finishes naturally."""
@@ -555,8 +866,11 @@ class CollaborativeNode:
         # Case 3: Play next in queue
         elif len(self.state.playlist) > 0:
             if self.state.repeat_mode == 1 and self.state.current_song:
-                self.state.playlist.append(self.state.current_song)
-            target_song = self.state.playlist.pop(0)
+                with self.state.lock:
+                    self.state.playlist.append(self.state.current_song)
+                self._broadcast('QUEUE_SYNC', {'song': self.state.current_song.to_compact()})
+            with self.state.lock:
+                target_song = self.state.playlist.popleft()
             if self.state.current_song and self.state.current_song.id != target_song.id:
                 self.history.append(self.state.current_song)
             self.state.current_song = target_song
@@ -566,28 +880,38 @@ class CollaborativeNode:
             self._handle_queue_end()
 
         if target_song:
-            self._play_song_logic(target_song, start_offset)
+            # One resolve + stat for the boundary; _play_song_logic reuses it
+            self._play_song_logic(target_song, start_offset, probe=self._probe_file(target_song))
 
     def start(self):
         self.network.start_server()
         self.discovery.start_listener(self.on_peer_discovered)
         self.discovery.broadcast_presence()
         
+        # The maintenance loop also kicks off the first election after ELECTION_START_DELAY
+        self._started_at = time.monotonic()
         threading.Thread(target=self._maintenance_loop, daemon=True).start()
+        self.ui.root.after(UI_REFRESH_MS, self._ui_refresh_loop)
         self.ui_log(f"Node started. ID: {self.node_id}")
         
-        # Delay election to allow discovery
-        def delayed_election():
-            time.sleep(3.0) 
-            self.ui_log(f"start: ELECTION (Score-Based)")
-            self.election.start_election()
-        threading.Thread(target=delayed_election, daemon=True).start()
-        
         self.ui.run()
 
     def on_peer_discovered(self, pid, ip, port):
-        if str(pid) != str(self.node_id):
+        pid = str(pid)
+        if pid == str(self.node_id) or pid in self.network.connections: return
+        with self._dial_lock:
+            # Each HELLO arrives several times (multicast, broadcast, localhost)
+            if pid in self._dialing: return
+            self._dialing.add(pid)
+        self._dial_pool.submit(self._dial_peer, pid, ip, port)
+
+    def _dial_peer(self, pid, ip, port):
+        """Runs on the dial pool, so a slow handshake never stalls discovery."""
+        try:
             self.network.connect_to_peer(pid, ip, port)
+        finally:
+            with self._dial_lock:
+                self._dialing.discard(pid)
 
 if __name__ == "__main__":
     name = None
@@ -1,66 +1,115 @@
-import pygame
 import os
+import time
+from src.utils.config import AUDIO_FREQUENCY, AUDIO_BUFFER, DEBUG_LOG
+
+DEFAULT_VOLUME = 0.7  # Applied when the mixer starts
+FAST_SEEK_EXTS = {'.ogg', '.flac'}  # set_pos() takes an absolute position in seconds for these
 
 class AudioEngine:
-    """Handles local audio playback using pygame. Supports seeking and volume control."""
+    """
+    Handles local audio playback using pygame. Supports seeking and volume control.
+    pygame (and SDL's mixer) is loaded on first playback, so listeners never pay for it.
+    """
     
     def __init__(self, logger_callback=None):
         self.logger = logger_callback
         self.is_playing = False
-        
-        try:
-            pygame.mixer.init()
-            # Set default volume
-            pygame.mixer.music.set_volume(0.7)
-            self.log("Audio Engine initialized.")
-        except Exception as e:
-            self.log(f"Failed to initialize audio: {e}")
+        self.volume = DEFAULT_VOLUME
+        self._music = None # pygame.mixer.music once started, see _mixer()
+        # Track currently loaded into the mixer; replaying it (seek/restart) skips stat and load
+        self._loaded_path = None
+        self._loaded_name = None
+        # Playback clock on time.monotonic(): pygame's get_pos() drifts on long MP3s.
+        # _clock_start is when the current start point (play/seek) began, shifted
+        # forward by time spent paused; _paused_at is set while paused.
+        self._clock_start = 0.0
+        self._paused_at = None
+
+    def log(self, fmt, *args):
+        """Logs fmt % args; formatting is skipped entirely when no logger is attached."""
+        if self.logger: self.logger("[Audio] " + (fmt % args if args else fmt))
+
+    def debug(self, fmt, *args):
+        """Like log(), but only with DEBUG_LOG on (e.g. per-seek lines)."""
+        if DEBUG_LOG and self.logger: self.logger("[Audio] " + (fmt % args if args else fmt))
 
-    def log(self, text):
-        if self.logger: self.logger(f"[Audio] {text}")
+    def _mixer(self):
+        """Returns pygame.mixer.music, importing pygame and starting the mixer on first use."""
+        if self._music is None:
+            import pygame  # Deferred: only nodes that actually play audio load SDL
+            try:
+                pygame.mixer.init(frequency=AUDIO_FREQUENCY, size=-16, channels=2, buffer=AUDIO_BUFFER)
+                pygame.mixer.music.set_volume(self.volume)
+                self.log("Audio Engine initialized.")
+            except Exception as e:
+                self.log("Failed to initialize audio: %s", e)
+            self._music = pygame.mixer.music
+        return self._music
 
-    def play_song(self, song_path, start_time=0):
-        """Plays a song, optionally starting from a specific offset in seconds."""
-        if not song_path or not os.path.exists(song_path):
-            self.log(f"Playback error: File not found at {song_path}")
+    def ensure_mixer(self):
+        """
+        Starts the mixer if playback hasn't yet (e.g. for a pygame duration probe).
+        Returns False if it could not be started.
+        """
+        self._mixer()
+        import pygame
+        return bool(pygame.mixer.get_init())
+
+    def play_song(self, song_path, start_time=0, verified=False):
+        """
+        Plays a song, optionally starting from a specific offset in seconds.
+        `verified` skips the existence check when the caller just stat'ed the file.
+        Replaying the already-loaded track (seek, restart) reuses the loaded stream.
+        """
+        reload = song_path != self._loaded_path
+        if reload and (not song_path or (not verified and not os.path.exists(song_path))):
+            self.log("Playback error: File not found at %s", song_path)
             return False
 
         try:
-            pygame.mixer.music.load(song_path)
+            music = self._mixer()
+            if reload:
+                self._loaded_path = None # Stays unset if load() fails
+                music.load(song_path)
+                self._loaded_path, self._loaded_name = song_path, os.path.basename(song_path)
             # pygame.mixer.music.play(loops, start_time_in_seconds)
-            pygame.mixer.music.play(start=start_time)
+            music.play(start=start_time)
+            self._clock_start, self._paused_at = time.monotonic(), None
             self.is_playing = True
             if start_time > 0:
-                self.log(f"Resuming: {os.path.basename(song_path)} at {start_time:.1f}s")
+                self.debug("Resuming: %s at %.1fs", self._loaded_name, start_time)
             else:
-                self.log(f"Playing: {os.path.basename(song_path)}")
+                self.log("Playing: %s", self._loaded_name)
             return True
         except Exception as e:
-            self.log(f"Pygame error: {e}")
+            self.log("Pygame error: %s", e)
             return False
 
     def get_current_pos(self):
-        """Returns the current playback position in seconds."""
+        """Returns seconds played since the last play() or seek() start point."""
         if self.is_busy():
-            # get_pos() returns milliseconds since play() was called
-            return pygame.mixer.music.get_pos() / 1000.0
+            return (self._paused_at or time.monotonic()) - self._clock_start
         return 0
 
     def set_volume(self, volume):
         """Sets the music volume (0.0 to 1.0)."""
+        self.volume = volume
+        if self._music is None: return # Applied when the mixer starts
         try:
-            pygame.mixer.music.set_volume(volume)
+            self._music.set_volume(volume)
         except:
             pass
 
     def is_busy(self):
+        if self._music is None: return False
         try:
-            return pygame.mixer.music.get_busy()
+            return self._music.get_busy()
         except:
             return False
 
     def stop(self):
-        pygame.mixer.music.stop()
+        if self._music is not None:
+            self._music.stop()
         self.is_playing = False
 
     def toggle_pause(self):
@@ -69,18 +118,31 @@ class AudioEngine:
         Returns: True if paused, False if playing.
         """
         if self.is_playing:
-            pygame.mixer.music.pause()
+            self._mixer().pause()
+            self._paused_at = time.monotonic()
             self.is_playing = False
             return True
         else:
-            pygame.mixer.music.unpause()
+            self._mixer().unpause()
+            if self._paused_at is not None:
+                self._clock_start += time.monotonic() - self._paused_at
+                self._paused_at = None
             self.is_playing = True
             return False
 
     def seek(self, time_sec, file_path):
         """
-        Simulates seeking by stopping and restarting the track at the specific offset.
-        Required because pygame.mixer.music.set_pos() is unreliable for many formats.
+        Moves playback to time_sec, leaving it playing. Formats with a reliable absolute
+        set_pos() (FAST_SEEK_EXTS) seek in place; everything else, or a failed set_pos(),
+        stops and restarts the track at the offset.
         """
+        if (file_path == self._loaded_path and self.is_playing and self.is_busy()
+                and os.path.splitext(file_path)[1].lower() in FAST_SEEK_EXTS):
+            try:
+                self._music.set_pos(time_sec)
+                self._clock_start = time.monotonic()
+                return
+            except Exception:
+                pass
         self.stop()
-        self.play_song(file_path, start_time=time_sec)
\ No newline at end of file
+        self.play_song(file_path, start_time=time_sec)
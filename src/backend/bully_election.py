@@ -1,6 +1,51 @@
+import sched
 import threading
 import time
-from src.utils.config import ELECTION_TIMEOUT, HOST_TIMEOUT
+import traceback
+from src.utils.config import DEBUG_LOG, ELECTION_DEBOUNCE, ELECTION_TIMEOUT, HOST_TIMEOUT
+
+class _TimeoutScheduler:
+    """
+    Runs delayed callbacks on one long-lived daemon thread, instead of a
+    threading.Timer thread per election. enter() wakes the thread so an
+    earlier deadline is never stuck behind a later one.
+    """
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self._sched = sched.scheduler(time.monotonic, self._sleep)
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _sleep(self, delay):
+        if self._wake.wait(delay):
+            self._wake.clear()
+
+    def _run(self):
+        while True:
+            self._sched.run()
+            self._wake.wait()
+            self._wake.clear()
+
+    def enter(self, delay, action):
+        """Schedules action() after delay seconds; returns a handle for cancel()."""
+        event = self._sched.enter(delay, 1, self._guard, (action,))
+        self._wake.set()
+        return event
+
+    def cancel(self, event):
+        """Cancels a pending handle; a no-op if it already ran or was cancelled."""
+        try:
+            self._sched.cancel(event)
+        except ValueError:
+            pass
+
+    @staticmethod
+    def _guard(action):
+        # An exception must not kill the shared thread
+        try:
+            action()
+        except Exception:
+            traceback.print_exc()
 
 # TODO Handle heartbeat/battery based host assignment
 class ElectionManager:
@@ -16,102 +61,161 @@ class ElectionManager:
         self.is_election_running = False
         self.received_answer = False
         
-        self.init_time = time.time()
+        self.init_time = time.monotonic()
         self.last_heartbeat = self.init_time
+        self._last_election_start = float('-inf')
         self.is_host = False
         
-        self.lock = threading.RLock()
+        self.lock = threading.Lock() # Never held across calls back into this class
 
-    def log(self, text):
-        if self.logger: self.logger(f"[Election] {text}")
+        # Election timeouts run on one scheduler thread; only the latest check stays pending
+        self._timeouts = _TimeoutScheduler()
+        self._pending_check = None
+
+    def log(self, fmt, *args):
+        """Logs fmt % args; formatting is skipped entirely when no logger is attached."""
+        if self.logger: self.logger("[Election] " + (fmt % args if args else fmt))
+
+    def debug(self, fmt, *args):
+        """Like log(), but only with DEBUG_LOG on: for per-packet lines and peer dumps."""
+        if DEBUG_LOG and self.logger: self.logger("[Election] " + (fmt % args if args else fmt))
+
+    @property
+    def uptime(self):
+        """Whole seconds since this manager started; read straight off the monotonic clock, no state lock."""
+        return int(time.monotonic() - self.init_time)
 
     def start_election(self):
         """Initiates an election by notifying all higher-ID nodes."""
+        leader_id = self.state.get_host()
+        now = time.monotonic()
         with self.lock:
-            self.leader_id = self.state.get_host()
-            self.log(self.state.peers)
-            self.log(f"Starting election. My ID: {self.node_id}")
+            # A round started moments ago is still collecting answers: a second
+            # trigger would only re-send the same ELECTION to the same peers
+            if self.is_election_running and now - self._last_election_start < ELECTION_DEBOUNCE:
+                return
+            self._last_election_start = now
+            self.leader_id = leader_id
             self.is_election_running = True
             self.received_answer = False
+        self.debug("Known peers: %s", self.network.peer_ids)
+        self.log("Starting election. My ID: %s", self.node_id)
             
-        higher_nodes = [pid for pid in self.network.state.peers.keys() if pid > self.node_id]
+        # Only connected peers can answer; higher ones come from a bisect of the sorted ids
+        higher_nodes = self.network.peers_above(self.node_id)
         
         if not higher_nodes:
             # I am the highest ID node
             self.declare_victory()
         else:
-            for pid in higher_nodes:
-                payload={
-                    'uptime': self.state.get_uptime()
-                }
-                self.network.send_to_peer(pid, 'ELECTION', payload=payload)
+            payload={
+                'uptime': self.uptime
+            }
+            # Encoded once for all higher nodes
+            self.network.broadcast('ELECTION', payload=payload, peers=higher_nodes)
             
             # Wait for ANSWER messages
-            threading.Timer(ELECTION_TIMEOUT, self._check_election_results).start()
+            self._schedule_check(self._check_election_results)
+
+    def query_commission(self):
+        """
+        Modified-Bully entry point: sends ELECTION only to the highest-ID live peer
+        instead of every higher node. Falls back to the full election if that
+        peer does not answer within ELECTION_TIMEOUT.
+        """
+        with self.lock:
+            if self.is_election_running: return
+            self.is_election_running = True
+            self.received_answer = False
+
+        target = self.network.max_peer_id
+        if target is None or target <= self.node_id:
+            # I am the highest connected node
+            self.declare_victory()
+            return
+
+        self.log("Querying %s as election commission", target)
+        self.network.send_to_peer(target, 'ELECTION', payload={'uptime': self.uptime})
+        self._schedule_check(self._check_commission)
+
+    def _schedule_check(self, check):
+        """Runs check after ELECTION_TIMEOUT, replacing any check still pending."""
+        with self.lock:
+            if self._pending_check is not None:
+                self._timeouts.cancel(self._pending_check)
+            self._pending_check = self._timeouts.enter(ELECTION_TIMEOUT, check)
+
+    def _check_commission(self):
+        """Falls back to the full Bully election if the queried peer stayed silent."""
+        with self.lock:
+            answered = self.received_answer
+            self.is_election_running = False
+        if not answered:
+            self.log("No answer from commission. Falling back to full election.")
+            self.start_election()
 
     def _check_election_results(self):
         """Checks if any higher-ID node responded during the timeout."""
         with self.lock:
-            self.log("Election timeout reached.")
-            if not self.received_answer and self.is_election_running:
-                self.declare_victory()
+            won = not self.received_answer and self.is_election_running
             self.is_election_running = False
+        self.log("Election timeout reached.")
+        if won:
+            self.declare_victory()
 
     def on_election_received(self, sender_id, sender_uptime):
         # Use composite metric: primary = uptime, secondary = node ID
-        my_metric = (self.node_id, self.state.get_uptime() )
+        my_metric = (self.node_id, self.uptime)
         sender_metric = (sender_id, sender_uptime)
-        self.log(f"Election received from {sender_id}. My metric: {my_metric}, Sender metric: {sender_metric}")
+        self.debug("Election received from %s. My metric: %s, Sender metric: %s", sender_id, my_metric, sender_metric)
         if sender_metric < my_metric:
             self.network.send_to_peer(sender_id, 'ANSWER')
-            self.log(f"Sent ANSWER to {sender_id}")
-            # Start own election to propagate
+            self.debug("Sent ANSWER to %s", sender_id)
+            # Propagate upwards through the highest peer only (O(n) instead of O(n^2))
             if not self.is_election_running:
-                self.start_election()
+                self.query_commission()
 
     def on_answer_received(self):
         """Called when a higher-ID node acknowledges it is taking over."""
         with self.lock:
             self.received_answer = True
-            self.log("Higher-ID node answered. Waiting for coordinator...")
+        self.log("Higher-ID node answered. Waiting for coordinator...")
 
     def declare_victory(self):
         """Declares self as the new Leader/Host."""
         with self.lock:
             self.is_host = True
             self.leader_id = self.node_id
-            self.state.set_host(self.node_id)
-            self.log("I am the new Host!")
+        self.state.set_host(self.node_id)
+        self.log("I am the new Host!")
         
-        # Notify everyone
-        for pid in self.network.connections.keys():
-            self.network.send_to_peer(pid, 'COORDINATOR', payload={'leader_id': self.node_id})
+        # Notify everyone (encoded once for all peers)
+        self.network.broadcast('COORDINATOR', payload={'leader_id': self.node_id})
 
     def on_coordinator_received(self, leader_id):
         """Updated when a new coordinator is announced."""
         with self.lock:
             self.leader_id = leader_id
-            self.state.set_host(leader_id)
             self.is_host = (leader_id == self.node_id)
             self.is_election_running = False
-            self.update_heartbeat()
-            self.log(f"New Host: {leader_id}")
+        self.state.set_host(leader_id)
+        self.update_heartbeat()
+        self.log("New Host: %s", leader_id)
 
     def on_heartbeat_received(self):
         """Resets the failure detection timer."""
         self.update_heartbeat()
 
-    def check_for_host_failure(self):
-        """Continuously monitors if the current Host is alive."""
+    def check_for_host_failure(self, now=None):
+        """Continuously monitors if the current Host is alive. `now` is a time.monotonic() reading."""
         if not self.is_host and self.leader_id:
-            if time.time() - self.last_heartbeat > HOST_TIMEOUT:
-                self.log(f"Host {self.leader_id} timed out! Starting election...")
+            if (now if now is not None else time.monotonic()) - self.last_heartbeat > HOST_TIMEOUT:
+                self.log("Host %s timed out! Starting election...", self.leader_id)
                 self.leader_id = None
                 if (not self.is_election_running):
                     self.start_election()
 
     def update_heartbeat(self):
-        with self.lock:
-            self.last_heartbeat = time.time()
-            self.state.update_uptime(int(self.last_heartbeat - self.init_time))
-            #self.log(f"Updated heartbeat. Uptime: {self.state.uptime} seconds")
\ No newline at end of file
+        # A single float store; check_for_host_failure reads it without the lock.
+        # Uptime is refreshed by the maintenance loop, not on every received TICK
+        self.last_heartbeat = time.monotonic()
\ No newline at end of file
@@ -1,9 +1,27 @@
+import selectors
 import socket
+import struct
 import threading
-import pickle
 import sys
-from src.utils.config import UDP_PORT, get_local_ip
-from src.utils.models import Message
+from src.utils.config import UDP_PORT, UDP_MCAST_GROUP, UDP_RCVBUF, get_local_ip
+
+# HELLO datagram: tag, TCP port, node id length, then the UTF-8 node id.
+# The sender's IP is taken from the datagram's source address.
+HELLO_HEADER = struct.Struct('!BHB')
+HELLO_TAG = 0x48  # 'H'
+
+def _parse_hello(data):
+    """Returns (sender_id, tcp_port) from a HELLO datagram, or None if it is not one."""
+    if len(data) < HELLO_HEADER.size:
+        return None
+    tag, tcp_port, id_len = HELLO_HEADER.unpack_from(data)
+    id_end = HELLO_HEADER.size + id_len
+    if tag != HELLO_TAG or id_end > len(data):
+        return None
+    try:
+        return str(data[HELLO_HEADER.size:id_end], 'utf-8'), tcp_port
+    except UnicodeDecodeError:
+        return None
 
 class DiscoveryManager:
     """Handles UDP broadcasting and listening for peer discovery."""
@@ -14,6 +32,14 @@ class DiscoveryManager:
         self.local_ip = get_local_ip()
         self.logger = logger_callback
         self.running = True
+        # The HELLO never changes after init, so it is encoded once
+        node_id = str(node_id).encode()
+        self._hello_bytes = HELLO_HEADER.pack(HELLO_TAG, tcp_port, len(node_id)) + node_id
+        # Send socket kept for the manager's lifetime, separate from the listener's
+        self._send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._send_sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self._send_sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+        self._send_sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
 
     def log(self, text):
         if self.logger:
@@ -46,42 +72,73 @@ class DiscoveryManager:
             except OSError as e:
                 self.log(f"Critical Bind Error: {e}. Another instance might be blocking the port.")
                 return
+
+            # Room for HELLO bursts from many peers at once; the kernel clamps the
+            # request to net.core.rmem_max (raise that sysctl to get the full size)
+            try:
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RCVBUF)
+            except OSError:
+                pass
+
+            # Also receive the multicast HELLO; unlike unicast to 127.0.0.1 it reaches
+            # every instance sharing this port via SO_REUSEPORT
+            try:
+                mreq = struct.pack('4s4s', socket.inet_aton(UDP_MCAST_GROUP), socket.inet_aton('0.0.0.0'))
+                s.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+            except OSError as e:
+                self.log(f"Multicast join failed ({e}); relying on broadcast.")
             
-            while self.running:
-                try:
-                    data, addr = s.recvfrom(4096)
-                    msg = pickle.loads(data)
+            # Non-blocking socket behind a selector: each wakeup drains every queued
+            # datagram, so a burst of HELLOs costs one wakeup instead of one per packet
+            s.setblocking(False)
+            sel = selectors.DefaultSelector()
+            sel.register(s, selectors.EVENT_READ)
+
+            # One receive buffer for the thread's lifetime; datagrams are parsed in place
+            buf = bytearray(4096)
+            view = memoryview(buf)
+            try:
+                while self.running:
+                    if not sel.select(timeout=0.5):
+                        continue
+                    # Each HELLO arrives up to three times (multicast, broadcast, localhost);
+                    # only the last copy per sender in this batch is reported
+                    found = {}
+                    while True:
+                        try:
+                            nbytes, addr = s.recvfrom_into(buf)
+                        except (BlockingIOError, InterruptedError):
+                            break
+                        except OSError as e:
+                            if self.running:
+                                self.log(f"Error in listen loop: {e}")
+                            break
+                        parsed = _parse_hello(view[:nbytes])
+                        if parsed and parsed[0] != self.node_id: # Ignore self
+                            found[parsed[0]] = (addr[0], parsed[1])
 
-                    if msg.sender_id == self.node_id:
-                        continue # Ignore self
-                    
-                    if msg.msg_type == 'HELLO':
-                        self.log(f"Peer {msg.sender_id} found at {addr[0]}")
-                        on_peer_found(msg.sender_id, addr[0], msg.payload.get('tcp_port'))
-                except Exception as e:
-                    if self.running:
-                        self.log(f"Error in listen loop: {e}")
+                    for sender_id, (ip, tcp_port) in found.items():
+                        try:
+                            self.log(f"Peer {sender_id} found at {ip}")
+                            on_peer_found(sender_id, ip, tcp_port)
+                        except Exception as e:
+                            if self.running:
+                                self.log(f"Error in listen loop: {e}")
+            finally:
+                sel.close()
 
     def broadcast_presence(self):
         """Broadcasts a HELLO message to the subnet."""
-        # We use a separate socket for sending to avoid interference with the listener
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-            
-            msg = Message(
-                sender_id=self.node_id,
-                sender_ip=self.local_ip,
-                msg_type='HELLO',
-                payload={'tcp_port': self.tcp_port}
-            )
-            
-            # Broadcast to the entire subnet
-            s.sendto(pickle.dumps(msg), ('<broadcast>', UDP_PORT))
-            # Also send to localhost explicitly to help local instances find each other
-            s.sendto(pickle.dumps(msg), ('127.0.0.1', UDP_PORT))
-            # Send to all local network interfaces
-            s.sendto(pickle.dumps(msg), ('255.255.255.255', UDP_PORT))
-            self.log("Broadcasted presence to network.")
+        # Link-local multicast (looped back to local instances too), subnet
+        # broadcast for older nodes not in the group, and localhost as a last
+        # resort when no interface is up. ('<broadcast>' is 255.255.255.255.)
+        for target in (UDP_MCAST_GROUP, '<broadcast>', '127.0.0.1'):
+            try:
+                self._send_sock.sendto(self._hello_bytes, (target, UDP_PORT))
+            except OSError:
+                pass
+        self.log("Broadcasted presence to network.")
 
     def stop(self):
-        self.running = False
\ No newline at end of file
+        self.running = False
+        self._send_sock.close()
\ No newline at end of file
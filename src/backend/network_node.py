@@ -1,13 +1,50 @@
+import os
 import socket
+from bisect import bisect_right
+import selectors
 import threading
-import pickle
 import struct
 import time
-from typing import Dict
-from src.utils.config import TCP_PORT, BUFFER_SIZE
-from src.utils.models import Message
+from collections import deque
+from typing import Dict, List
+import msgpack
+from src.utils.config import TCP_PORT, BUFFER_SIZE, get_local_ip
+from src.utils.models import Message, Song
 from src.backend.state_manager import RELIABLE_MSG_TYPES
 
+# Outbound sender configuration
+SEND_CHUNK_SIZE = 16384     # Max bytes handed to one peer's (non-blocking) socket per pass, so peers take turns
+SEND_POLL_TIMEOUT = 0.5     # Seconds to wait for any pending socket to become writable
+HAS_SENDMSG = hasattr(socket.socket, 'sendmsg')  # Scatter/gather send (not available on Windows)
+
+# Peer connection tuning
+KEEPALIVE_IDLE = 10         # Seconds of silence before TCP keepalive probes start
+KEEPALIVE_INTERVAL = 3      # Seconds between keepalive probes
+KEEPALIVE_COUNT = 3         # Unanswered probes before the kernel drops the connection
+RECONNECT_BASE_DELAY = 1.0  # First re-dial delay after a dialed peer drops (doubles each try)
+RECONNECT_MAX_DELAY = 30.0  # Cap on the re-dial delay
+RECONNECT_ATTEMPTS = 5      # Re-dials before giving up (discovery can still reconnect later)
+OUTBOX_LOSSY_LIMIT = 65536  # Once a peer has this many bytes queued, lossy frames for it are dropped
+LOSSY_MSG_TYPES = {'TICK', 'PLAYBACK_SYNC'}  # Superseded by the next tick, safe to drop for slow peers
+
+# Message-type sets checked per message (hashed lookups, built once)
+UNLOGGED_MSG_TYPES = frozenset({'HEARTBEAT', 'TICK', 'PLAYBACK_SYNC', 'ACK'})  # Too frequent to log
+CAUSAL_BYPASS_TYPES = frozenset({'HELLO', 'WELCOME', 'HEARTBEAT', 'TICK', 'ELECTION', 'ANSWER', 'COORDINATOR',
+                                 'REQUEST_STATE', 'NOW_PLAYING', 'PLAYBACK_SYNC', 'ACK'})  # Delivered without vector-clock ordering
+CLOCK_BUMP_TYPES = frozenset({'QUEUE_SYNC', 'FULL_STATE_SYNC', 'REMOVE_SONG'})  # Increment our clock entry when sent
+
+# Wire framing: every frame is a 4-byte length prefix plus a body. Bodies are
+# msgpack-encoded Message.to_compact() arrays (always starting 0x96), except
+# TICK, which is sent every heartbeat and so uses a fixed 18-byte struct instead.
+LEN_PREFIX = struct.Struct('>I')
+TICK_FRAME = struct.Struct('>BBdd')  # tag, flags, pos, dur
+TICK_WIRE = struct.Struct('>IBBdd')  # LEN_PREFIX + TICK_FRAME, packed in one call
+TICK_FRAME_TAG = 0x01
+TICK_HAS_POS = 0x01
+TICK_IS_PLAYING = 0x02
+# A position-less TICK (plain heartbeat) never changes, so it is framed once
+IDLE_TICK_FRAME = TICK_WIRE.pack(TICK_FRAME.size, TICK_FRAME_TAG, 0, 0.0, 0.0)
+
 class NetworkNode:
     """
     The communication backbone of the decentralized playlist.
@@ -23,6 +60,9 @@ class NetworkNode:
         
         # This port is dynamically assigned by CollaborativeNode in main.py
         self.port = TCP_PORT 
+        # Optional already-bound listening socket (also from main.py); otherwise
+        # _server_loop binds self.port itself
+        self.listen_socket = None
         
         # Subsystem references (populated by main.py)
         self.election = None
@@ -30,16 +70,47 @@ class NetworkNode:
         
         # Active peer connections: {node_id: socket}
         self.connections: Dict[str, socket.socket] = {}
+        # Immutable sorted snapshot of connected peer ids, swapped whenever connections
+        # change, so hot broadcast paths iterate without copying and elections can bisect
+        self.peer_ids: tuple = ()
+        self.max_peer_id = None # Highest id in peer_ids (the Bully commission), kept alongside it
+        self._conn_lock = threading.Lock()
+        # Addresses of peers this node dialed, for re-dialing after a drop: {node_id: (ip, port)}
+        self._dial_addrs: Dict[str, tuple] = {}
+
+        # Outbound queues flushed by the sender thread: {node_id: [socket, deque of frames, queued bytes]}
+        # Frames are shared (not copied) between peers of a broadcast.
+        # The socket is stored so stale bytes never leak onto a reconnected peer.
+        self._outbox: Dict[str, List] = {}
+        self._outbox_cv = threading.Condition()
+
+        # Sockets waiting to be registered with the reader thread, plus a socketpair
+        # that wakes its select() when one is queued
+        self._reader_inbox = deque()
+        self._reader_wake_r, self._reader_wake_w = socket.socketpair()
+        # Receive buffer owned by the reader thread; every peer socket recv_into()s it
+        self._recv_buf = bytearray(BUFFER_SIZE)
+        self._recv_view = memoryview(self._recv_buf)
+
+        # _handle_logic dispatch: {msg_type: handler}; types without an entry are ignored
+        self._handlers = {
+            'WELCOME': self._on_welcome,
+            'HEARTBEAT': self._on_heartbeat,
+            'TICK': self._on_tick,
+            'HELLO': self._on_hello,
+            'REQUEST_STATE': self._on_request_state,
+            'FULL_STATE_SYNC': self._on_full_state_sync,
+            'ELECTION': self._on_election,
+            'ANSWER': self._on_answer,
+            'COORDINATOR': self._on_coordinator,
+            'QUEUE_SYNC': self._on_queue_sync,
+            'REMOVE_SONG': self._on_remove_song,
+            'NOW_PLAYING': self._on_now_playing,
+            'PLAYBACK_SYNC': self._on_playback_sync,
+        }
         
-        # Resolve local IP address
-        try:
-            # Connect to a dummy external address to find the primary local interface IP
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            self.ip = s.getsockname()[0]
-            s.close()
-        except Exception:
-            self.ip = socket.gethostbyname(socket.gethostname())
+        # Resolve local IP address (shared, cached lookup)
+        self.ip = get_local_ip()
 
     def log(self, text):
         """Standardized logging for the network subsystem."""
@@ -47,80 +118,186 @@ class NetworkNode:
             self.logger(f"[Network] {text}")
 
     def start_server(self):
-        """Starts the background thread to listen for incoming TCP connections."""
+        """Starts the background threads for incoming TCP connections, reads and outbound sends."""
         thread = threading.Thread(target=self._server_loop, daemon=True)
         thread.start()
+        threading.Thread(target=self._reader_loop, daemon=True).start()
+        threading.Thread(target=self._sender_loop, daemon=True).start()
 
     def _server_loop(self):
         """TCP Server loop to accept connections from other peers on the LAN."""
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s = self.listen_socket
+        if s is None:
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            # Same rule as CollaborativeNode._bind_listener: on Windows
+            # SO_REUSEADDR would let two nodes share one live port
+            if os.name != 'nt':
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             try:
                 s.bind(('', self.port))
             except Exception as e:
                 self.log(f"CRITICAL: Bind failed on {self.port}: {e}")
+                s.close()
                 return
-                
+
+        with s:
             s.listen(5)
             self.log(f"Server listening on {self.port}")
             
             while self.running:
                 try:
                     conn, addr = s.accept()
-                    threading.Thread(target=self._handle_client, args=(conn, addr), daemon=True).start()
+                    self._tune_socket(conn)
+                    self._watch(conn)
                 except: pass
 
-    def _recv_all(self, conn, n):
-        data = bytearray()
-        while len(data) < n:
-            packet = conn.recv(n - len(data))
-            if not packet: return None
-            data.extend(packet)
-        return data
-
-    def _handle_client(self, conn, addr):
-        """Listens for and deserializes incoming Message objects from a peer."""
-        peer_id = None
+    def _watch(self, conn, peer_id=None):
+        """
+        Hands a connected peer socket to the reader thread. Dialed sockets pass the
+        peer_id they were dialed for, so sender-less binary TICKs on them are dispatched
+        from the first frame; accepted sockets learn it from the peer's first message.
+        """
+        self._reader_inbox.append((conn, peer_id))
         try:
+            self._reader_wake_w.send(b'\0')
+        except OSError:
+            pass
+
+    def _reader_loop(self):
+        """
+        Single reader thread for every peer socket (instead of one thread each).
+        Each readable socket gets one recv_into() the shared receive buffer; complete
+        frames are then processed in order. Per-socket selector data is [peer_id or None, receive buffer].
+        """
+        with selectors.DefaultSelector() as sel:
+            sel.register(self._reader_wake_r, selectors.EVENT_READ)
             while self.running:
-                header = self._recv_all(conn, 4)
-                if not header: break
-                msg_len = struct.unpack('>I', header)[0]
-                data = self._recv_all(conn, msg_len)
-                if not data: break
-                
-                msg = pickle.loads(data)
-                peer_id = str(msg.sender_id)
-                
-                # GUARD: Ignore any node connecting to itself (loopback)
-                if peer_id == self.node_id:
-                    conn.close()
-                    return
-                
-                # Register connection mapping if new
-                if peer_id not in self.connections:
-                    self.connections[peer_id] = conn
-                
-                self._process_message(msg)
+                while self._reader_inbox:
+                    conn, peer_id = self._reader_inbox.popleft()
+                    try:
+                        sel.register(conn, selectors.EVENT_READ, [peer_id, bytearray()])
+                    except (ValueError, KeyError, OSError):
+                        conn.close()
+                for key, _ in sel.select():
+                    if key.fileobj is self._reader_wake_r:
+                        self._reader_wake_r.recv(BUFFER_SIZE)
+                    elif not self._read_peer(key.fileobj, key.data):
+                        sel.unregister(key.fileobj)
+                        self._close_reader(key.fileobj, key.data[0])
+
+    def _read_peer(self, conn, ctx):
+        """Reads from one readable peer socket. Returns False once it should be closed."""
+        peer_id, buf = ctx
+        try:
+            try:
+                nbytes = conn.recv_into(self._recv_buf)
+            except (BlockingIOError, InterruptedError):
+                return True  # Spurious readiness; the selector reports it again
+            if not nbytes: return False
+            # No partial frame pending: parse straight out of the receive buffer and
+            # keep only an incomplete tail. Otherwise join the pending bytes first.
+            if buf:
+                buf += self._recv_view[:nbytes]
+                data = buf
+            else:
+                data = self._recv_view[:nbytes]
+            pos = 0
+            while len(data) - pos >= LEN_PREFIX.size:
+                end = pos + LEN_PREFIX.size + LEN_PREFIX.unpack_from(data, pos)[0]
+                if len(data) < end: break
+                if not self._handle_frame(conn, ctx, data[pos + LEN_PREFIX.size:end]):
+                    return False
+                pos = end
+            if data is buf:
+                del buf[:pos]
+            else:
+                buf += data[pos:]
+            return True
         except Exception as e:
             if self.running:
-                self.log(f"Peer {peer_id} disconnected: {e}")
-                if self.state.is_host(peer_id) and self.election:
+                self.log(f"Peer {ctx[0]} disconnected: {e}")
+                if self.state.is_host(ctx[0]) and self.election:
                     self.election.start_election()
-                
-        finally:
-            if peer_id in self.connections: self.connections.pop(peer_id)
-            conn.close()
+            return False
+
+    def _handle_frame(self, conn, ctx, data):
+        """
+        Deserializes and processes one frame body. Returns False to close the socket.
+        `data` may be a view of the shared receive buffer, so it must not be kept.
+        """
+        if data[0] == TICK_FRAME_TAG:
+            # Binary TICKs carry no sender; the peer identified itself earlier
+            if ctx[0] is not None:
+                self._process_message(self._unpack_tick(data, ctx[0]))
+            return True
+
+        msg = self.decode_message(data)
+        peer_id = ctx[0] = str(msg.sender_id)
+
+        # GUARD: Ignore any node connecting to itself (loopback)
+        if peer_id == self.node_id:
+            return False
+
+        # Register connection mapping if new (unlocked fast path; the add itself is atomic,
+        # so a socket this node dialed meanwhile is not overwritten by the accepted one)
+        if peer_id not in self.connections:
+            self._add_connection(peer_id, conn, replace=False)
+
+        self._process_message(msg)
+        return True
+
+    def _close_reader(self, conn, peer_id):
+        """Forgets a closed peer socket and re-dials the peer if we dialed it."""
+        if peer_id is not None: self._remove_connection(peer_id, conn)
+        conn.close()
+        # Peers we dialed are re-dialed; the replacement socket is watched from then on
+        if self.running and peer_id in self._dial_addrs and peer_id not in self.connections:
+            threading.Thread(target=self._redial, args=(peer_id,), daemon=True).start()
+
+    def _tune_socket(self, sock):
+        """
+        Makes the socket non-blocking (the reader and sender threads only touch sockets
+        their selectors report ready, and a slow peer must never stall either of them),
+        enables TCP_NODELAY (small TICK/sync frames go out immediately), quick ACKs
+        where supported, and keepalive so a silently dead peer is detected by the kernel.
+        """
+        sock.setblocking(False)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if hasattr(socket, 'TCP_QUICKACK'): # Linux only; skips the initial delayed-ACK wait
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            # Per-socket timings are platform specific; Linux exposes all three
+            if hasattr(socket, 'TCP_KEEPIDLE'):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, KEEPALIVE_IDLE)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, KEEPALIVE_INTERVAL)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, KEEPALIVE_COUNT)
+        except OSError as e:
+            self.log(f"Socket tuning failed: {e}")
+
+    def _redial(self, node_id):
+        """Re-dials a dropped peer with exponential backoff until it is connected again."""
+        delay = RECONNECT_BASE_DELAY
+        for _ in range(RECONNECT_ATTEMPTS):
+            time.sleep(delay)
+            if not self.running or node_id in self.connections: return
+            ip, port = self._dial_addrs[node_id]
+            self.log(f"Reconnecting to {node_id}...")
+            if self.connect_to_peer(node_id, ip, port): return
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
 
     def connect_to_peer(self, node_id, ip, port):
+        """Dials a peer unless already connected. Returns True if a connection now exists."""
         node_id = str(node_id)
-        if node_id == self.node_id or node_id in self.connections: return
+        if node_id == self.node_id: return False
+        if node_id in self.connections: return True
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(3.0)
+            s.settimeout(3.0) # Only the connect blocks; _tune_socket makes the socket non-blocking
             s.connect((ip, port))
-            s.settimeout(None)
-            self.connections[node_id] = s
+            self._tune_socket(s)
+            self._add_connection(node_id, s)
+            self._dial_addrs[node_id] = (ip, port)
             self.state.update_peer(node_id, ip, port)
 
             if self.state.is_host(self.node_id):
@@ -128,27 +305,224 @@ class NetworkNode:
 
             self.send_to_peer(node_id, 'HELLO', payload={'id': self.node_id})
 
-            threading.Thread(target=self._handle_client, args=(s, (ip, port)), daemon=True).start()
+            self._watch(s, node_id)
+            return True
         except Exception as e:
             self.log(f"Connection failed to {node_id}: {e}")
+            return False
+
+    def encode_message(self, msg_type, payload=None):
+        """
+        Stamps and serializes a message into a length-prefixed frame.
+        The result can be handed to send_raw for any number of peers.
+        """
+        if msg_type == 'TICK':
+            return self._pack_tick(payload)
+        if msg_type in CLOCK_BUMP_TYPES:
+            clock = self.state.increment_clock()  # Returns its own snapshot
+        else:
+            # A snapshot, not the live dict: update_clock() on the reader thread may add
+            # keys while the frame is packed (pure-Python msgpack would then raise)
+            clock = self.state.clock_snapshot()
+        return self.frame_message(Message(self.node_id, self.ip, msg_type, payload, clock))
+
+    def frame_message(self, msg: Message):
+        """Serializes an already-built Message into a length-prefixed frame."""
+        data = msgpack.packb(msg.to_compact())
+        return LEN_PREFIX.pack(len(data)) + data
+
+    @staticmethod
+    def decode_message(data):
+        """
+        Inverse of frame_message for a frame body (length prefix already stripped).
+        Arrays decode as tuples, matching the to_compact() side; payloads are read-only.
+        """
+        return Message.from_compact(msgpack.unpackb(data, use_list=False))
+
+    def _pack_tick(self, payload):
+        """Frames a TICK as a TICK_FRAME struct: heartbeat plus optional pos/dur/is_playing."""
+        if payload and 'pos' in payload:
+            flags = TICK_HAS_POS | (TICK_IS_PLAYING if payload.get('is_playing') else 0)
+            return TICK_WIRE.pack(TICK_FRAME.size, TICK_FRAME_TAG, flags, payload['pos'], payload.get('dur', 0))
+        return IDLE_TICK_FRAME
+
+    def _unpack_tick(self, data, peer_id):
+        """Rebuilds the TICK Message for a binary frame received from peer_id."""
+        _, flags, pos, dur = TICK_FRAME.unpack(data)
+        payload = {}
+        if flags & TICK_HAS_POS:
+            payload = {'pos': pos, 'dur': dur, 'is_playing': bool(flags & TICK_IS_PLAYING)}
+        return Message(peer_id, '', 'TICK', payload)
+
+    def broadcast(self, msg_type, payload=None, peers=None):
+        """
+        Encodes a message once and queues the same frame for every peer
+        (all connected peers unless `peers` is given). Returns how many were queued.
+        """
+        if peers is None:
+            peers = self.peer_ids
+        if not peers: return 0
+        frame = self.encode_message(msg_type, payload)
+        lossy = msg_type in LOSSY_MSG_TYPES
+        connections = self.connections
+        queued = 0
+        # One lock round-trip and one sender wake-up for the whole fan-out
+        with self._outbox_cv:
+            for pid in peers:
+                conn = connections.get(pid)
+                if conn is not None:
+                    self._enqueue(pid, conn, frame, lossy)
+                    queued += 1
+            if queued: self._outbox_cv.notify()
+        return queued
+
+    def send_raw(self, node_id, frame, lossy=False):
+        """
+        Queues a pre-encoded frame for the sender thread and returns immediately.
+        A `lossy` frame is skipped while the peer is backed up past OUTBOX_LOSSY_LIMIT,
+        so a slow peer's buffer holds syncs that matter instead of stale positions.
+        Returns False if the peer is not connected.
+        """
+        conn = self.connections.get(node_id)
+        if conn is None: return False
+        with self._outbox_cv:
+            self._enqueue(node_id, conn, frame, lossy)
+            self._outbox_cv.notify()
+        return True
+
+    def _enqueue(self, node_id, conn, frame, lossy):
+        """Appends a frame to node_id's outbox (see send_raw). Caller holds _outbox_cv."""
+        entry = self._outbox.get(node_id)
+        if entry is None or entry[0] is not conn:
+            self._outbox[node_id] = [conn, deque([frame]), len(frame)]
+        elif lossy and entry[2] >= OUTBOX_LOSSY_LIMIT:
+            return
+        else:
+            entry[1].append(frame)
+            entry[2] += len(frame)
+
+    def _sender_loop(self):
+        """
+        Single writer thread. Waits for queued data, then uses a selector to
+        write only to sockets that are ready, so one slow peer never stalls
+        heartbeats or syncs to the others.
+        """
+        # One selector for the thread's lifetime (not an epoll fd per wake-up);
+        # it is emptied after every select so closed sockets never linger in it
+        with selectors.DefaultSelector() as sel:
+            while self.running:
+                with self._outbox_cv:
+                    while self.running and not self._outbox:
+                        self._outbox_cv.wait()
+                    pending = [(pid, entry[0]) for pid, entry in self._outbox.items()]
+
+                for pid, conn in pending:
+                    if self.connections.get(pid) is not conn:
+                        self._drop_peer(pid, conn)  # Peer went away or reconnected
+                        continue
+                    try:
+                        sel.register(conn, selectors.EVENT_WRITE, pid)
+                    except (ValueError, KeyError, OSError):
+                        self._drop_peer(pid, conn)
+                if not sel.get_map():
+                    continue
+                try:
+                    ready = sel.select(timeout=SEND_POLL_TIMEOUT)
+                finally:
+                    for key in list(sel.get_map().values()):
+                        try:
+                            sel.unregister(key.fileobj)
+                        except (ValueError, KeyError, OSError):
+                            pass
+
+                for key, _ in ready:
+                    self._flush_peer(key.data, key.fileobj)
+
+    def _flush_peer(self, node_id, conn):
+        """
+        Writes up to SEND_CHUNK_SIZE of a peer's queued frames to its (writable)
+        socket, gathering several frames into one sendmsg call where available.
+        """
+        with self._outbox_cv:
+            entry = self._outbox.get(node_id)
+            if entry is None or entry[0] is not conn: return
+            bufs, room = [], SEND_CHUNK_SIZE
+            for frame in entry[1]:
+                bufs.append(memoryview(frame)[:room])
+                room -= len(bufs[-1])
+                if room <= 0 or not HAS_SENDMSG: break
+        try:
+            sent = conn.sendmsg(bufs) if HAS_SENDMSG else conn.send(bufs[0])
+        except (BlockingIOError, InterruptedError):
+            return  # Send buffer filled up since select(); the frames stay queued
+        except OSError as e:
+            self.log(f"Send to {node_id} failed: {e}")
+            self._drop_peer(node_id, conn)
+            return
+        with self._outbox_cv:
+            entry = self._outbox.get(node_id)
+            if entry is not None and entry[0] is conn:
+                entry[2] -= sent
+                frames = entry[1]
+                while sent:
+                    head = frames[0]
+                    if sent < len(head):
+                        frames[0] = memoryview(head)[sent:]  # Partial write: keep the rest
+                        break
+                    sent -= len(head)
+                    frames.popleft()
+                if not frames:
+                    del self._outbox[node_id]
+
+    def _drop_peer(self, node_id, conn):
+        """Forgets a broken connection and any bytes still queued for it."""
+        self._remove_connection(node_id, conn)
+        try:
+            conn.shutdown(socket.SHUT_RDWR)  # Reader thread sees EOF and cleans up
+        except OSError:
+            pass
+        with self._outbox_cv:
+            entry = self._outbox.get(node_id)
+            if entry is not None and entry[0] is conn:
+                del self._outbox[node_id]
+
+    def _add_connection(self, node_id, conn, replace=True):
+        """
+        Registers a peer socket and republishes peer_ids. With replace=False an
+        existing mapping wins (checked under the lock). Returns True if conn was registered.
+        """
+        with self._conn_lock:
+            if not replace and node_id in self.connections:
+                return False
+            self.connections[node_id] = conn
+            self._publish_peer_ids()
+            return True
+
+    def _remove_connection(self, node_id, conn):
+        """Forgets node_id only if it still maps to conn (a reconnect may have replaced it)."""
+        with self._conn_lock:
+            if self.connections.get(node_id) is conn:
+                del self.connections[node_id]
+                self._publish_peer_ids()
+
+    def _publish_peer_ids(self):
+        """Rebuilds peer_ids and max_peer_id from connections. Caller holds _conn_lock."""
+        self.peer_ids = tuple(sorted(self.connections))
+        self.max_peer_id = self.peer_ids[-1] if self.peer_ids else None
+
+    def peers_above(self, node_id):
+        """Connected peer ids greater than node_id (the Bully 'higher nodes'), by bisection."""
+        peer_ids = self.peer_ids
+        return peer_ids[bisect_right(peer_ids, node_id):]
 
     def send_to_peer(self, node_id, msg_type, payload=None):
         if node_id not in self.connections: return
-        clock = self.state.vector_clock.copy()
-        if msg_type in ['QUEUE_SYNC', 'FULL_STATE_SYNC', 'REMOVE_SONG']:
-            clock = self.state.increment_clock()
-        msg = Message(self.node_id, self.ip, msg_type, payload, clock)
-        try:
-            data = pickle.dumps(msg)
-            header = struct.pack('>I', len(data))
-            self.connections[node_id].sendall(header + data)
-        except:
-            self.connections.pop(node_id, None)
+        self.send_raw(node_id, self.encode_message(msg_type, payload))
 
     def _process_message(self, msg: Message):
         sender_id = str(msg.sender_id)
         if sender_id == self.node_id: return
-        if msg.msg_type not in ['HEARTBEAT', 'PLAYBACK_SYNC', 'ACK']:
+        if msg.msg_type not in UNLOGGED_MSG_TYPES:
             self.log(f"Processing {msg.msg_type} from {sender_id}")
 
         # ============ RELIABLE MULTICAST: Handle ACK ============
@@ -167,8 +541,7 @@ class NetworkNode:
             if self.state.is_duplicate_message(msg.msg_id):
                 return
 
-        bypass_types = ['HELLO','WELCOME', 'HEARTBEAT', 'ELECTION', 'ANSWER', 'COORDINATOR', 'REQUEST_STATE', 'NOW_PLAYING', 'PLAYBACK_SYNC', 'ACK']
-        if msg.msg_type in bypass_types or self.state.can_process(msg):
+        if msg.msg_type in CAUSAL_BYPASS_TYPES or self.state.can_process(msg):
             self.state.update_clock(msg.vector_clock)
             self._handle_logic(msg)
             self._check_buffer()
@@ -176,77 +549,101 @@ class NetworkNode:
             self.state.pending_messages.append(msg)
 
     def _handle_logic(self, msg: Message):
-        m_type = msg.msg_type
-        if m_type == 'WELCOME': 
-            self.state.set_host(msg.sender_id)
-
-        elif m_type == 'HEARTBEAT':
-            if self.election:
-                self.election.on_heartbeat_received()
-
-        elif m_type == 'HELLO':
-            self.state.update_peer(msg.sender_id, msg.sender_ip, self.port)
-            # Only request state if we don't have a host or if this is the host
-            if not self.state.get_host() or self.state.is_host(msg.sender_id):
-                self.send_to_peer(msg.sender_id, 'REQUEST_STATE')
-
-        elif m_type == 'REQUEST_STATE':
-            self.send_to_peer(msg.sender_id, 'FULL_STATE_SYNC', payload={
-                'playlist': self.state.playlist,
-                'current_song': getattr(self.state, 'current_song', None)
-            })
-
-        elif m_type == 'FULL_STATE_SYNC':
-            incoming = msg.payload.get('playlist', [])
-            self.state.current_song = msg.payload.get('current_song')
-            # ATOMIC MERGE: Use the StateManager lock to prevent duplicates during concurrent syncs
-            with self.state.lock:
-                for s in incoming:
-                    # Check both ID AND Title to catch same-file-different-owner issues
-                    is_duplicate = any(local_s.id == s.id for local_s in self.state.playlist)
-                    if not is_duplicate:
-                        self.state.playlist.append(s)
-                        self.log(f"Synced song: {s.title}")
-
-        elif m_type in ['ELECTION', 'ANSWER', 'COORDINATOR']:
-            if self.election:
-                if m_type == 'ELECTION': 
-                    self.election.on_election_received(msg.sender_id, msg.payload.get('uptime'))
-                elif m_type == 'ANSWER': self.election.on_answer_received()
-                elif m_type == 'COORDINATOR': 
-                    leader_id = msg.payload['leader_id']
-                    self.election.on_coordinator_received(leader_id)
-                    if leader_id != self.node_id and self.audio: self.audio.stop()
-        
-        elif m_type == 'QUEUE_SYNC':
-            song = msg.payload.get('song')
-            if song:
-                with self.state.lock:
-                    if not any(s.id == song.id for s in self.state.playlist):
-                        self.state.playlist.append(song)
-                        self.log(f"Queue updated: {song.title}, {song.id}")
-
-        elif m_type == 'REMOVE_SONG':
-            sid = msg.payload.get('song_id')
-            self.state.playlist = [s for s in self.state.playlist if s.id != sid]
-
-        elif m_type == 'NOW_PLAYING':
-            song_obj = msg.payload.get('song')
-            self.state.current_song = song_obj
-            if song_obj:
-                self.state.now_playing_title = song_obj.title
-                self.state.playlist = [s for s in self.state.playlist if s.id != song_obj.id]
-        
-        elif m_type == 'PLAYBACK_SYNC':
-            self.state.current_song_pos = msg.payload.get('pos', 0)
+        handler = self._handlers.get(msg.msg_type)
+        if handler: handler(msg)
+
+    def _on_welcome(self, msg):
+        self.state.set_host(msg.sender_id)
+
+    def _on_heartbeat(self, msg):
+        if self.election:
+            self.election.on_heartbeat_received()
+
+    def _on_tick(self, msg):
+        # Host heartbeat with an optional piggybacked playback position
+        if self.election:
+            self.election.on_heartbeat_received()
+        if 'pos' in msg.payload:
+            self.state.current_song_pos = msg.payload['pos']
+
+    def _on_hello(self, msg):
+        self.state.update_peer(msg.sender_id, msg.sender_ip, self.port)
+        # Only request state if we don't have a host or if this is the host
+        if not self.state.get_host() or self.state.is_host(msg.sender_id):
+            self.send_to_peer(msg.sender_id, 'REQUEST_STATE')
+
+    def _on_request_state(self, msg):
+        current = getattr(self.state, 'current_song', None)
+        self.send_to_peer(msg.sender_id, 'FULL_STATE_SYNC', payload={
+            'playlist': [s.to_compact() for s in self.state.snapshot_playlist()],
+            'current_song': current.to_compact() if current else None,
+            'replace': bool(msg.payload.get('resync'))
+        })
+
+    def _on_full_state_sync(self, msg):
+        self.state.current_song = Song.from_compact(msg.payload.get('current_song'))
+        if 'delta' in msg.payload:
+            # Incremental update (e.g. shuffle): only changed entries travel
+            if not self.state.apply_playlist_delta(msg.payload['delta']):
+                # Our baseline differed from the sender's; fetch an authoritative snapshot
+                self.log("Playlist out of sync after delta. Requesting full state.")
+                self.send_to_peer(msg.sender_id, 'REQUEST_STATE', payload={'resync': True})
+            return
+        incoming = [Song.from_compact(t) for t in msg.payload.get('playlist', [])]
+        if msg.payload.get('replace'):
+            self.state.replace_playlist(incoming)
+            return
+        # ATOMIC MERGE: merge_songs holds the StateManager lock, so concurrent syncs can't duplicate
+        for s in self.state.merge_songs(incoming):
+            self.log(f"Synced song: {s.title}")
+
+    def _on_election(self, msg):
+        if self.election:
+            self.election.on_election_received(msg.sender_id, msg.payload.get('uptime'))
+
+    def _on_answer(self, msg):
+        if self.election:
+            self.election.on_answer_received()
+
+    def _on_coordinator(self, msg):
+        if self.election:
+            leader_id = msg.payload['leader_id']
+            self.election.on_coordinator_received(leader_id)
+            if leader_id != self.node_id and self.audio: self.audio.stop()
+
+    def _on_queue_sync(self, msg):
+        song = Song.from_compact(msg.payload.get('song'))
+        if song and self.state.merge_songs([song]):
+            self.log(f"Queue updated: {song.title}, {song.id}")
+
+    def _on_remove_song(self, msg):
+        self.state.remove_song(msg.payload.get('song_id'))
+
+    def _on_now_playing(self, msg):
+        song_obj = Song.from_compact(msg.payload.get('song'))
+        self.state.current_song = song_obj
+        if song_obj:
+            self.state.now_playing_title = song_obj.title
+            self.state.remove_song(song_obj.id)
+
+    def _on_playback_sync(self, msg):
+        self.state.current_song_pos = msg.payload.get('pos', 0)
 
     def _check_buffer(self):
-        changed = True
-        while changed:
-            changed = False
-            for msg in self.state.pending_messages[:]:
+        """
+        Delivers buffered messages whose causal dependencies are now met. Each pass
+        rotates the deque once (still-blocked messages go back on the end, in order);
+        passes repeat only while the previous one delivered something.
+        """
+        pending = self.state.pending_messages
+        delivered = True
+        while delivered and pending:
+            delivered = False
+            for _ in range(len(pending)):
+                msg = pending.popleft()
                 if self.state.can_process(msg):
                     self.state.update_clock(msg.vector_clock)
                     self._handle_logic(msg)
-                    self.state.pending_messages.remove(msg)
-                    changed = True
\ No newline at end of file
+                    delivered = True
+                else:
+                    pending.append(msg)
\ No newline at end of file
@@ -1,6 +1,8 @@
+import hashlib
 import threading
 import time
-from typing import Dict, List, Any, Set
+from collections import deque
+from typing import Deque, Dict, List, Any, Set
 from src.utils.models import Song, Message
 
 # Reliable Multicast Configuration
@@ -8,6 +10,10 @@ ACK_TIMEOUT = 2.0          # Seconds to wait before retransmitting
 MAX_RETRIES = 3            # Maximum retransmission attempts
 RELIABLE_MSG_TYPES = {'QUEUE_SYNC', 'REMOVE_SONG', 'FULL_STATE_SYNC'}  # Message types that require ACKs
 
+def playlist_digest(song_ids) -> str:
+    """Short fingerprint of a playlist order, so peers can verify a delta left them in sync."""
+    return hashlib.blake2b('\0'.join(song_ids).encode(), digest_size=8).hexdigest()
+
 class StateManager:
     """Manages the distributed state, including Vector Clocks and Playlist Queue."""
 
@@ -16,7 +22,10 @@ class StateManager:
         self.logger = logger_callback
 
         # Local state
-        self.playlist: List[Song] = []
+        self.playlist: Deque[Song] = deque() # Dequeued from the front on every track change
+        # {song_id: index} into playlist. Other code also mutates the list directly
+        # (popleft, appendleft, shuffle), so entries are verified on use and rebuilt if stale
+        self._id_index: Dict[str, int] = {}
         self.peers: Dict[str, Dict[str, Any]] = {} # node_id -> {ip, port, last_seen}
 
         # Vector Clock: {node_id: counter}
@@ -24,7 +33,8 @@ class StateManager:
 
         # Message buffer for causal ordering
         # Stores messages that arrived too early (waiting for dependencies)
-        self.pending_messages: List[Message] = []
+        # (a deque: _check_buffer rotates through it without copying or list.remove)
+        self.pending_messages: Deque[Message] = deque()
 
         # ============ RELIABLE MULTICAST STRUCTURES ============
         # Tracks messages awaiting ACKs: {msg_id: {msg, timestamp, pending_peers, retries}}
@@ -42,6 +52,7 @@ class StateManager:
         self.lock = threading.Lock()
 
         self.host_id = None
+        self.host_version = 0 # Bumped on every set_host so readers can cache leader lookups
 
     def log(self, text):
         if self.logger: self.logger(f"[State] {text}")
@@ -52,6 +63,11 @@ class StateManager:
             self.vector_clock[self.node_id] = self.vector_clock.get(self.node_id, 0) + 1
             return self.vector_clock.copy()
 
+    def clock_snapshot(self) -> Dict[str, int]:
+        """Copy of the vector clock taken under the lock, for stamping an outgoing message."""
+        with self.lock:
+            return dict(self.vector_clock)
+
     def update_clock(self, incoming_clock: Dict[str, int]):
         """Synchronizes local clock with incoming message clock."""
         with self.lock:
@@ -92,12 +108,124 @@ class StateManager:
         """
         return f"Node {node_id}"
 
+    def snapshot_playlist(self) -> List[Song]:
+        """
+        Copy of the playlist taken under the lock. Iterate this (not the deque) from
+        any thread that doesn't hold the lock: a deque mutated mid-iteration raises.
+        """
+        with self.lock:
+            return list(self.playlist)
+
     def add_song(self, song: Song):
         with self.lock:
             self.playlist.append(song)
+            self._id_index[song.id] = len(self.playlist) - 1
             self.log(f"Added to queue: {song.title} by {song.artist}")
             return True
+
+    def merge_songs(self, songs: List[Song]) -> List[Song]:
+        """
+        Appends the songs not already queued (by id), in order, and returns them.
+        One index rebuild per batch instead of a playlist scan per incoming song;
+        the index is left fresh for later remove_song() lookups.
+        """
+        with self.lock:
+            index = self._id_index = {s.id: i for i, s in enumerate(self.playlist)}
+            added = []
+            for song in songs:
+                if song.id not in index:
+                    index[song.id] = len(self.playlist)
+                    self.playlist.append(song)
+                    added.append(song)
+            return added
+
+    def remove_song(self, song_id) -> bool:
+        """Removes a song in place by id. Returns False if it isn't queued."""
+        with self.lock:
+            idx = self._index_of(song_id)
+            if idx is None:
+                return False
+            del self.playlist[idx]
+            del self._id_index[song_id]
+            self._reindex_from(idx)
+            return True
+
+    def _index_of(self, song_id):
+        """Index of song_id in playlist, or None. Caller holds self.lock."""
+        idx = self._id_index.get(song_id)
+        if idx is not None and idx < len(self.playlist) and self.playlist[idx].id == song_id:
+            return idx
+        self._id_index = {s.id: i for i, s in enumerate(self.playlist)}
+        return self._id_index.get(song_id)
+
+    def _reindex_from(self, start):
+        """Refreshes index entries shifted by a removal at start. Caller holds self.lock."""
+        for i in range(start, len(self.playlist)):
+            self._id_index[self.playlist[i].id] = i
         
+    def make_playlist_delta(self, baseline_ids: List[str]) -> Dict[str, Any]:
+        """
+        Diffs the local playlist against the order peers are known to hold.
+        Returns {'added': [compact songs], 'removed': [ids], 'moved': [(id, idx)],
+        'digest': playlist_digest of the resulting order}.
+        """
+        with self.lock:
+            current = list(self.playlist)
+        current_ids = [s.id for s in current]
+        current_set = set(current_ids)
+        baseline_set = set(baseline_ids)
+
+        added = [s for s in current if s.id not in baseline_set]
+        removed = [sid for sid in baseline_ids if sid not in current_set]
+
+        # Order a peer ends up with after applying removals and appending additions
+        expected = [sid for sid in baseline_ids if sid in current_set] + [s.id for s in added]
+        moved = [(sid, idx) for idx, sid in enumerate(current_ids) if expected[idx] != sid]
+
+        return {'added': [s.to_compact() for s in added], 'removed': removed, 'moved': moved,
+                'digest': playlist_digest(current_ids)}
+
+    def apply_playlist_delta(self, delta: Dict[str, Any]) -> bool:
+        """
+        Applies a make_playlist_delta() result. Idempotent for repeated adds/removes.
+        Returns False if the result doesn't match the sender's order (this node held a
+        different baseline), in which case the caller should ask for a full snapshot.
+        """
+        with self.lock:
+            removed = set(delta.get('removed', []))
+            songs = [s for s in self.playlist if s.id not in removed]
+            known = {s.id for s in songs}
+            for t in delta.get('added', []):
+                song = Song.from_compact(t)
+                if song.id not in known:
+                    songs.append(song)
+                    known.add(song.id)
+
+            moved = [(sid, idx) for sid, idx in delta.get('moved', []) if sid in known]
+            if moved:
+                by_id = {s.id: s for s in songs}
+                moved_ids = {sid for sid, _ in moved}
+                # Moved songs take their target slots; the rest keep their relative order
+                slots = [None] * len(songs)
+                for sid, idx in moved:
+                    if 0 <= idx < len(slots) and slots[idx] is None:
+                        slots[idx] = by_id[sid]
+                    else:
+                        moved_ids.discard(sid)
+                rest = iter(s for s in songs if s.id not in moved_ids)
+                songs = [slot if slot is not None else next(rest) for slot in slots]
+
+            self.playlist.clear()
+            self.playlist.extend(songs)
+            digest = delta.get('digest')
+            return digest is None or digest == playlist_digest([s.id for s in songs])
+
+    def replace_playlist(self, songs: List[Song]):
+        """Adopts an authoritative snapshot (after a failed delta) in place of the local order."""
+        with self.lock:
+            self.playlist.clear()
+            self.playlist.extend(songs)
+
     def update_uptime(self, seconds):
         with self.lock:
             self.uptime = seconds
@@ -109,6 +237,7 @@ class StateManager:
     def set_host(self, node_id):
         with self.lock:
             self.host_id = node_id
+            self.host_version += 1
             self.log(f"Set host to: {self.host_id}")
 
     def get_host(self):
@@ -130,7 +259,7 @@ class StateManager:
         with self.ack_lock:
             self.pending_acks[msg_id] = {
                 'msg': msg,
-                'timestamp': time.time(),
+                'timestamp': time.monotonic(),
                 'pending_peers': set(target_peers),
                 'retries': 0
             }
@@ -161,7 +290,7 @@ class StateManager:
         Each entry: {msg_id, msg, peers}
         """
         retransmit = []
-        current_time = time.time()
+        current_time = time.monotonic()
 
         with self.ack_lock:
             expired_ids = []
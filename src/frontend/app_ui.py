@@ -8,8 +8,14 @@ and switches layouts between Host Mode (controls visible) and Listener Mode.
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import queue
+import time
+from collections import deque
 from src.frontend.styles import *
+from src.utils.timefmt import clock_stamp
+
+LOG_BUFFER_SIZE = 500    # Oldest lines are dropped if the UI falls behind
+LOG_DRAIN_BATCH = 100    # Max lines written to the terminal per drain pass
+LOG_DRAIN_MS = 250       # Drain interval of the terminal buffer
 
 class PlaylistUI:
     def __init__(self, window_title, on_add_song_callback):
@@ -30,14 +36,18 @@ class PlaylistUI:
         self.on_remove_song = None
         self.on_volume_change = None
         
-        # Thread-safe logging queue
-        self.msg_queue = queue.Queue()
+        # Lock-free log ring buffer of (timestamp, message); deque append/popleft are atomic
+        self.log_buffer = deque(maxlen=LOG_BUFFER_SIZE)
         
         # UI State Flags
         self.controls_visible = None 
         self.debug_visible = False
         self.is_dragging_seek = False 
         self.tree_map = {} 
+        self._playing_iid = None # Row currently tagged "playing"
+        # Python-side shadows of the tree, so syncing and checkbox checks need no Tcl reads
+        self._tree_order = [] # Row iids in display order
+        self._checked = set() # Row iids whose checkbox is ticked
         
         self._setup_styles()
         self._setup_layout()
@@ -264,15 +274,13 @@ class PlaylistUI:
                     new_status = "☑" if current_status == "☐" else "☐"
                     new_values = (new_status,) + current_values[1:]
                     self.tree.item(item_id, values=new_values)
+                    if new_status == "☑": self._checked.add(item_id)
+                    else: self._checked.discard(item_id)
                     self._check_selection_state()
 
     def _check_selection_state(self):
         if not self.controls_visible: return
-        has_checked = False
-        for child in self.tree.get_children():
-            if self.tree.item(child, "values")[0] == "☑":
-                has_checked = True
-                break
+        has_checked = bool(self._checked)
         
         state = "normal" if has_checked else "disabled"
         bg = ACCENT if has_checked else BTN_DISABLED_BG
@@ -282,9 +290,8 @@ class PlaylistUI:
     def _handle_remove_checked(self):
         if not self.on_remove_song: return
         items_to_remove = []
-        for child in self.tree.get_children():
-            val = self.tree.item(child, "values")
-            if val[0] == "☑":
+        for child in self._tree_order:
+            if child in self._checked:
                 song_id = self.tree_map.get(child)
                 if song_id: items_to_remove.append(song_id)
         
@@ -422,25 +429,46 @@ class PlaylistUI:
         self.now_playing_artist.config(text=artist)
 
     def update_playlist(self, songs, current_song_id=None):
-        # Preserve Checked State during update
-        current_items = self.tree.get_children()
-        checked_ids = set()
-        
-        for item_id in current_items:
-            vals = self.tree.item(item_id, "values")
-            if vals and vals[0] == "☑":
-                 sid = self.tree_map.get(item_id)
-                 if sid: checked_ids.add(sid)
-        
-        self.tree.delete(*self.tree.get_children())
-        self.tree_map.clear()
-
+        """
+        Syncs the tree with `songs` incrementally. Rows use the song id as iid, so
+        only added/removed rows are touched, reorders are moves, and check marks
+        survive on untouched rows.
+        """
+        order = self._tree_order
+        desired, seen = [], set()
         for song in songs:
-            check_mark = "☑" if song.id in checked_ids else "☐"
-            tags = ("playing",) if current_song_id == song.id else ()
-            
-            iid = self.tree.insert("", "end", values=(check_mark, song.title, song.artist, song.added_by), tags=tags)
-            self.tree_map[iid] = song.id 
+            if song.id not in seen: # iids must be unique
+                seen.add(song.id)
+                desired.append(song)
+
+        stale = [iid for iid in order if iid not in seen]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale: self.tree_map.pop(iid, None)
+            stale = set(stale)
+            self._checked -= stale
+            order = [iid for iid in order if iid not in stale]
+        if self._playing_iid not in self.tree_map:
+            self._playing_iid = None
+
+        present = set(order)
+        for idx, song in enumerate(desired):
+            if song.id not in present:
+                self.tree.insert("", idx, iid=song.id, values=("☐", song.title, song.artist, song.added_by))
+                self.tree_map[song.id] = song.id
+                order.insert(idx, song.id)
+            elif order[idx] != song.id:
+                # Reordered (e.g. shuffle): move the row into place
+                self.tree.move(song.id, "", idx)
+                order.remove(song.id)
+                order.insert(idx, song.id)
+        self._tree_order = order
+
+        playing = current_song_id if current_song_id in self.tree_map else None
+        if playing != self._playing_iid:
+            if self._playing_iid: self.tree.item(self._playing_iid, tags=())
+            if playing: self.tree.item(playing, tags=("playing",))
+            self._playing_iid = playing
             
         self.tree.tag_configure("playing", foreground=ACCENT, font=("Segoe UI", 10, "bold"))
         self._check_selection_state()
@@ -458,8 +486,9 @@ class PlaylistUI:
         if file_path:
             self.on_add_song(file_path)
 
-    def log_message(self, message):
-        self.msg_queue.put(message)
+    def log_message(self, message, timestamp=None):
+        """Buffers a log line; formatting happens later on the UI thread."""
+        self.log_buffer.append((timestamp if timestamp is not None else time.time(), message))
 
     def _copy_all_logs(self):
         self.root.clipboard_clear()
@@ -488,21 +517,25 @@ class PlaylistUI:
         self.debug_visible = not self.debug_visible
 
     def _start_queue_listener(self):
-        """Polls the message queue to update the debug terminal from the main thread."""
+        """Drains the log buffer into the debug terminal from the main thread."""
+        lines = []
         try:
-            while True:
-                msg = self.msg_queue.get_nowait()
-                should_scroll = self.log_box.yview()[1] == 1.0
-                
-                self.log_box.config(state="normal")
-                self.log_box.insert("end", f"{msg}\n")
-                
-                if should_scroll:
-                    self.log_box.see("end")
-                self.log_box.config(state="disabled")
-        except queue.Empty:
+            while len(lines) < LOG_DRAIN_BATCH:
+                ts, msg = self.log_buffer.popleft()
+                lines.append(f"[{clock_stamp(ts)}] {msg}\n")
+        except IndexError:
             pass
-        self.root.after(100, self._start_queue_listener)
+
+        if lines:
+            should_scroll = self.log_box.yview()[1] == 1.0
+            
+            self.log_box.config(state="normal")
+            self.log_box.insert("end", "".join(lines))
+            
+            if should_scroll:
+                self.log_box.see("end")
+            self.log_box.config(state="disabled")
+        self.root.after(LOG_DRAIN_MS, self._start_queue_listener)
 
     def run(self):
         self.root.mainloop()
\ No newline at end of file
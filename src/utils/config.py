@@ -1,22 +1,53 @@
+import functools
 import socket
 
 # Networking Constants
 UDP_PORT = 5000          # For UDP Peer Discovery
+UDP_MCAST_GROUP = '224.0.0.200'  # Link-local discovery group (never routed off the subnet)
 TCP_PORT = 5001          # For TCP State Sync
 BUFFER_SIZE = 8192       # Standard buffer for object serialization
+UDP_RCVBUF = 1 << 20     # Discovery receive buffer; Linux caps it at net.core.rmem_max
 
 # Timing Constants (Seconds) - Optimized for faster failover
 HEARTBEAT_INTERVAL = 1.0 
 HOST_TIMEOUT = 6.0     # Time to wait before declaring host down
 ELECTION_TIMEOUT = 3.0
+ELECTION_DEBOUNCE = 1.0   # Repeat election starts within this window are dropped while one is running
+ELECTION_START_DELAY = 3.0  # Wait after startup before the first election (discovery)
 
+# Maintenance loop cadence (in HEARTBEAT_INTERVAL ticks)
+FOLLOWER_TICK_FACTOR = 2 # Non-hosts check for host failure every N ticks (well under HOST_TIMEOUT)
+
+# UI
+UI_REFRESH_MS = 250      # Tk-thread refresh interval; unchanged widget groups are skipped
+
+# Audio (mixer starts on first playback)
+AUDIO_FREQUENCY = 44100  # Output sample rate (Hz)
+AUDIO_BUFFER = 2048      # Samples per mixer buffer (~46 ms): smaller = lower latency, more xrun risk
+
+# Logging
+CONSOLE_LOG = True       # Mirror log lines to stdout (set False to skip stdio)
+DEBUG_LOG = False        # Verbose diagnostics (per-packet election metrics, peer dumps, seeks)
+
+@functools.lru_cache(maxsize=1)
 def get_local_ip():
-    """Dynamically finds the local IP on the LAN."""
+    """
+    Dynamically finds the local IP on the LAN. The route lookup runs once
+    per process; call invalidate_local_ip() after an interface change.
+    """
     try:
+        # Connect to a dummy external address to find the primary local interface IP
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         s.connect(("8.8.8.8", 80))
         ip = s.getsockname()[0]
         s.close()
         return ip
     except Exception:
-        return "127.0.0.1"
\ No newline at end of file
+        try:
+            return socket.gethostbyname(socket.gethostname())
+        except OSError:
+            return "127.0.0.1"
+
+def invalidate_local_ip():
+    """Forgets the cached address so the next get_local_ip() looks it up again."""
+    get_local_ip.cache_clear()
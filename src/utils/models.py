@@ -1,17 +1,27 @@
 from dataclasses import dataclass, field
-import uuid
+import os
 import time
 from typing import Dict, Any, Optional
 
 @dataclass
 class Song:
     """Represents a music track in the decentralized queue."""
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = field(default_factory=lambda: os.urandom(16).hex()) # 128 random bits, like uuid4
     title: str = "Unknown Title"
     artist: str = "Unknown Artist"
     file_path: str = ""
     added_by: str = ""
     timestamp: float = field(default_factory=time.time)
+    duration: float = 0.0 # Seconds, probed once by the adding node (0 = unknown)
+
+    def to_compact(self) -> tuple:
+        """Wire form: a plain tuple of the fields in declaration order."""
+        return (self.id, self.title, self.artist, self.file_path, self.added_by, self.timestamp, self.duration)
+
+    @classmethod
+    def from_compact(cls, data) -> Optional["Song"]:
+        """Rebuilds a Song from to_compact() output (None passes through)."""
+        return cls(*data) if data else None
 
 @dataclass
 class Message:
@@ -23,8 +33,18 @@ class Message:
     # Vector Clock for Causal Ordering
     vector_clock: Dict[str, int] = field(default_factory=dict)
     # Unique Message ID for Reliable Multicast (ACK tracking)
-    msg_id: str = field(default_factory=lambda: str(uuid.uuid4())[:8])
+    # 8 random hex chars (32 bits), without building a UUID per message
+    msg_id: str = field(default_factory=lambda: os.urandom(4).hex())
 
     def __post_init__(self):
         if self.payload is None:
-            self.payload = {}
\ No newline at end of file
+            self.payload = {}
+
+    def to_compact(self) -> tuple:
+        """Wire form: a plain tuple of the fields in declaration order (see Song.to_compact)."""
+        return (self.sender_id, self.sender_ip, self.msg_type, self.payload, self.vector_clock, self.msg_id)
+
+    @classmethod
+    def from_compact(cls, data) -> "Message":
+        """Rebuilds a Message from to_compact() output."""
+        return cls(*data)
\ No newline at end of file
@@ -0,0 +1,16 @@
+import time
+
+# (whole second, its 'HH:MM:SS' text). Swapped as one tuple so any thread can
+# read it without a lock; log bursts within a second share one strftime.
+_last_stamp = (None, "")
+
+def clock_stamp(ts):
+    """Formats a time.time() value as local 'HH:MM:SS', cached per second."""
+    global _last_stamp
+    sec = int(ts)
+    cached = _last_stamp
+    if cached[0] == sec:
+        return cached[1]
+    text = time.strftime('%H:%M:%S', time.localtime(sec))
+    _last_stamp = (sec, text)
+    return text
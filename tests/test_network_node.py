@@ -0,0 +1,50 @@
+import socket
+import threading
+import time
+import unittest
+
+from src.backend.network_node import NetworkNode, TICK_WIRE, TICK_FRAME, TICK_FRAME_TAG, TICK_HAS_POS
+from src.backend.state_manager import StateManager
+
+
+class _HeartbeatRecorder:
+    """Stands in for ElectionManager; records heartbeats."""
+    def __init__(self):
+        self.beats = threading.Event()
+
+    def on_heartbeat_received(self):
+        self.beats.set()
+
+
+class DialedSocketTickTest(unittest.TestCase):
+    def setUp(self):
+        self.state = StateManager('aaaa', None)
+        self.state.current_song_pos = 0
+        self.node = NetworkNode('aaaa', self.state, lambda text: None)
+        self.node.election = _HeartbeatRecorder()
+        self.node.port = 0 # Ephemeral listen port
+        self.node.start_server()
+        self.peer_listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.peer_listener.bind(('127.0.0.1', 0))
+        self.peer_listener.listen(1)
+
+    def tearDown(self):
+        self.node.running = False
+        self.peer_listener.close()
+
+    def test_binary_tick_before_any_msgpack_frame_is_dispatched(self):
+        port = self.peer_listener.getsockname()[1]
+        self.assertTrue(self.node.connect_to_peer('bbbb', '127.0.0.1', port))
+        peer, _ = self.peer_listener.accept()
+        with peer:
+            # The peer's very first frame is a binary TICK (it never sends msgpack)
+            peer.sendall(TICK_WIRE.pack(TICK_FRAME.size, TICK_FRAME_TAG, TICK_HAS_POS, 42.5, 200.0))
+            self.assertTrue(self.node.election.beats.wait(2.0))
+            deadline = time.monotonic() + 2.0
+            while self.state.current_song_pos != 42.5 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(self.state.current_song_pos, 42.5)
+
+
+if __name__ == '__main__':
+    unittest.main()